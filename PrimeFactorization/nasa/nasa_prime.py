@@ -1,196 +1,29 @@
-import xml.etree.ElementTree as ET
-from xml.etree.ElementTree import Element
-import time
-import os
-import psutil
-
-class XmlNode:
-    def __init__(self, name, element):
-        self.Name = name
-        self.Children = []
-        self.Label = None
-        self.Element = element
-    
-    def AddChild(self, child):
-        self.Children.append(child)
-
-class XmlLabeler:
-    @staticmethod
-    def BuildTree(element):
-        node = XmlNode(element.tag, element)
-        
-        for child_element in element:
-            child_node = XmlLabeler.BuildTree(child_element)
-            node.AddChild(child_node)
-        
-        return node
-    
-    @staticmethod
-    def ExportLabeledXml(node, output_path):
-        labeled_element = XmlLabeler.AddLabelsToXml(node)
-        tree = ET.ElementTree(labeled_element)
-        ET.indent(tree, space="  ", level=0)
-        tree.write(output_path, encoding='utf-8', xml_declaration=True)
-    
-    @staticmethod
-    def AddLabelsToXml(node):
-        element = Element(node.Element.tag)
-        element.set("label", str(node.Label))
-        
-        # Copy attributes from original element
-        for key, value in node.Element.attrib.items():
-            element.set(key, value)
-        
-        # Copy text content if exists
-        if node.Element.text and node.Element.text.strip():
-            element.text = node.Element.text
-        
-        # Add children
-        for child in node.Children:
-            element.append(XmlLabeler.AddLabelsToXml(child))
-        
-        return element
-    
-    @staticmethod
-    def GetMemoryUsage():
-        process = psutil.Process(os.getpid())
-        return process.memory_info().rss // 1024  # KB
-    
-class PrimeLabeler:
-    def label_tree(self, element, pLabel):
-        element.Label = pLabel.copy()  
-        for j in range(1, len(element.Children)+1):
-            pout = pLabel.copy()
-            pout.append(j)
-            self.label_tree(element.Children[j-1], pout)
-        
-    def InsertNode(self, parent, newNode):
-        parent.AddChild(newNode)
-
-    def InsertLabeledNode(self, parent, newNode):
-        parent.AddChild(newNode)
-        newNode.Label = parent.Label.copy()
-        newNode.Label.append(len(parent.Children))
-        pLabel = newNode.Label
-        for j in range(1, len(newNode.Children)+1):
-            pout = pLabel.copy()
-            pout.append(j)
-            self.label_tree(newNode.Children[j-1], pout)
-
-def main():
-    input_file_path = "nasa.xml"
-    output_file_path = "prime_nasa.xml"
-    # Load XML document
-    tree = ET.parse(input_file_path)
-    root = tree.getroot()
-    root_node = XmlLabeler.BuildTree(root)
-    
-    prime_labeler = PrimeLabeler()
-
-    # Initial labeling
-    start_time = time.time()
-    initial_memory = XmlLabeler.GetMemoryUsage()
-
-    prime_labeler.label_tree(root_node, [])
-
-    final_memory = XmlLabeler.GetMemoryUsage()
-    elapsed_time = (time.time() - start_time) * 1000  # ms
-
-    print(f"Initial labeling time: {elapsed_time:.2f} ms")
-    print(f"Memory Used During Labeling: {final_memory - initial_memory} KB")
-
-    # Create new element to insert
-    new_element = ET.Element("dataset")
-    new_element.set("subject", "astronomy")
-    new_element.set("xmlns:xlink", "http://www.w3.org/XML/XLink/0.9")
-    
-    title = ET.SubElement(new_element, "title")
-    title.text = "Proper Motions of Stars in the Zone Catalogue -40 to -52 degrees of 20843 Stars for 1900"
-    
-    altname1 = ET.SubElement(new_element, "altname")
-    altname1.set("type", "ADC")
-    altname1.text = "1005"
-    
-    altname2 = ET.SubElement(new_element, "altname")
-    altname2.set("type", "CDS")
-    altname2.text = "I/5"
-    
-    altname3 = ET.SubElement(new_element, "altname")
-    altname3.set("type", "brief")
-    altname3.text = "Proper Motions in Cape Zone Catalogue -40/-52"
-    
-    reference = ET.SubElement(new_element, "reference")
-    source = ET.SubElement(reference, "source")
-    other = ET.SubElement(source, "other")
-    
-    other_title = ET.SubElement(other, "title")
-    other_title.text = "Proper Motions of Stars in the Zone Catalogue"
-    
-    author1 = ET.SubElement(other, "author")
-    initial1 = ET.SubElement(author1, "initial")
-    initial1.text = "J"
-    lastName1 = ET.SubElement(author1, "lastName")
-    lastName1.text = "Spencer"
-    
-    author2 = ET.SubElement(other, "author")
-    initial2 = ET.SubElement(author2, "initial")
-    initial2.text = "J"
-    lastName2 = ET.SubElement(author2, "lastName")
-    lastName2.text = "Jackson"
-    
-    name = ET.SubElement(other, "name")
-    name.text = "His Majesty's Stationery Office, London"
-    
-    publisher = ET.SubElement(other, "publisher")
-    publisher.text = "???"
-    
-    city = ET.SubElement(other, "city")
-    city.text = "???"
-    
-    date = ET.SubElement(other, "date")
-    year = ET.SubElement(date, "year")
-    year.text = "1936"
-    
-    keywords = ET.SubElement(new_element, "keywords")
-    keywords.set("parentListURL", "http://messier.gsfc.nasa.gov/xml/keywordlists/adc_keywords.html")
-    
-    keyword1 = ET.SubElement(keywords, "keyword")
-    keyword1.set("xlink:href", "Positional_data.html")
-    keyword1.text = "Positional data"
-    
-    keyword2 = ET.SubElement(keywords, "keyword")
-    keyword2.set("xlink:href", "Proper_motions.html")
-    keyword2.text = "Proper motions"
-    
-    descriptions = ET.SubElement(new_element, "descriptions")
-    description = ET.SubElement(descriptions, "description")
-    para = ET.SubElement(description, "para")
-    para.text = "This catalog, listing the proper motions of 20,843 stars from the Cape Astrographic Zones..."
-    ET.SubElement(descriptions, "details")
-    
-    identifier = ET.SubElement(new_element, "identifier")
-    identifier.text = "I_5.xml"
-    
-    # Insert the new node
-    # Create new node and insert it
-    new_node = XmlLabeler.BuildTree(new_element)
-    
-
-    # Relabel the tree after insertion
-    start_time = time.time()
-    initial_memory = XmlLabeler.GetMemoryUsage()
-
-    prime_labeler.InsertLabeledNode(root_node, new_node)
-
-    final_memory = XmlLabeler.GetMemoryUsage()
-    elapsed_time = (time.time() - start_time) * 1000  # ms
-
-    print(f"Time taken to label after insertion: {elapsed_time:.2f} ms")
-    print(f"Memory Used During Relabeling After Insertion: {final_memory - initial_memory} KB")
-
-    # Export the labeled XML
-    XmlLabeler.ExportLabeledXml(root_node, output_file_path)
-    print(f"Labeled XML has been saved to {output_file_path}")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import os
+import xml.etree.ElementTree as ET
+from xmllabel import cli
+
+# nasa.xml labeled with the dewey scheme through the xmllabel command line:
+#   python nasa_prime.py [label|insert|query] [xmllabel options]
+# e.g. `label --mode chunked --scheme prime` or `query "//dataset/altname[@type='ADC']"`
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nasa.xml")
+# Labeled XML written next to the dataset, before or after the inserts
+OUTPUTS = {"label": "prime_nasa.xml", "insert": "prime_nasa.xml"}
+QUERY = "//dataset/altname[@type='ADC']"
+# The dataset record `insert` adds under the root
+PAYLOAD = ('<dataset subject="astronomy" xmlns:xlink="http://www.w3.org/XML/XLink/0.9">'
+           "<title>Proper Motions of Stars in the Zone Catalogue -40 to -52 degrees of 20843 Stars for 1900"
+           '</title><altname type="ADC">1005</altname><altname type="CDS">I/5</altname>'
+           '<altname type="brief">Proper Motions in Cape Zone Catalogue -40/-52</altname><reference><source>'
+           "<other><title>Proper Motions of Stars in the Zone Catalogue</title><author><initial>J</initial>"
+           "<lastName>Spencer</lastName></author><author><initial>J</initial><lastName>Jackson</lastName>"
+           "</author><name>His Majesty's Stationery Office, London</name><publisher>???</publisher><city>???"
+           "</city><date><year>1936</year></date></other></source></reference>"
+           '<keywords parentListURL="http://messier.gsfc.nasa.gov/xml/keywordlists/adc_keywords.html">'
+           '<keyword xlink:href="Positional_data.html">Positional data</keyword>'
+           '<keyword xlink:href="Proper_motions.html">Proper motions</keyword></keywords><descriptions>'
+           "<description>"
+           "<para>This catalog, listing the proper motions of 20,843 stars from the Cape Astrographic Zones..."
+           "</para></description><details/></descriptions><identifier>I_5.xml</identifier></dataset>")
+
+if __name__ == "__main__":
+    cli.DatasetMain(DATASET, "dewey", ET.fromstring(PAYLOAD), QUERY, OUTPUTS)
@@ -0,0 +1,88 @@
+import xml.etree.ElementTree as ET
+from xml.etree.ElementTree import Element
+import sys
+import time
+from xmllabel.core import XmlNode
+from xmllabel.prime import XmlLabeler, PrimeLabeler, PrimeNumberLabeler, PrimeLabel
+
+class RecursiveTraversal:
+    # Previous recursive BuildTree, one Python call per node
+    @staticmethod
+    def BuildTree(element):
+        node = XmlNode(element.tag, element)
+        for child_element in element:
+            node.AddChild(RecursiveTraversal.BuildTree(child_element))
+        return node
+
+class RecursivePrimeLabeler(PrimeLabeler):
+    # Previous list labels, copied for every node
+    def label_tree(self, element, pLabel):
+        element.Label = pLabel.copy()
+        children = element.Children
+        for j in range(1, len(children)+1):
+            pout = pLabel.copy()
+            pout.append(j * self.gap)
+            self.label_tree(children[j-1], pout)
+
+    def RootLabel(self):
+        return []
+
+class RecursivePrimeNumberLabeler(PrimeNumberLabeler):
+    def label_tree(self, element, pLabel=None):
+        if pLabel is None:
+            self.nextPrime = self.offset
+            self.root = element
+            self.groups, self.scValues = [], []
+            element.Label = PrimeLabel(1, 1)
+        else:
+            selfPrime = self.primeTable.Get(self.nextPrime)
+            self.nextPrime += 1
+            element.Label = PrimeLabel(selfPrime, pLabel * selfPrime)
+            self.AddOrder(element.Label, self.Order(selfPrime))
+        for child in element.Children:
+            self.label_tree(child, element.Label.Value)
+
+def ChainDocument(depth):
+    root = Element("chain")
+    current = root
+    for _ in range(depth):
+        child = Element("node")
+        current.append(child)
+        current = child
+    return root
+
+def Best(function, runs):
+    best = None
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        try:
+            result = function()
+        except RecursionError:
+            return None, "RecursionError"
+        elapsed_time = (time.perf_counter() - start_time) * 1000  # ms
+        best = elapsed_time if best is None else min(best, elapsed_time)
+    return result, f"{best:.2f} ms"
+
+def Compare(name, element, runs):
+    print(f"{name}:")
+    for kind, build, dewey, prime in (
+            ("recursive", RecursiveTraversal.BuildTree, RecursivePrimeLabeler(), RecursivePrimeNumberLabeler()),
+            ("iterative", XmlLabeler.BuildTree, PrimeLabeler(), PrimeNumberLabeler())):
+        root, build_time = Best(lambda: build(element), runs)
+        if root is None:
+            print(f"  {kind}: BuildTree {build_time}")
+            continue
+        _, dewey_time = Best(lambda: dewey.label_tree(root, dewey.RootLabel()), runs)
+        _, prime_time = Best(lambda: prime.label_tree(root), runs)
+        print(f"  {kind}: BuildTree {build_time}, Dewey label_tree {dewey_time}, "
+              f"prime label_tree {prime_time}")
+
+def main():
+    runs = 3
+    inputs = sys.argv[1:] if len(sys.argv) > 1 else ["wsu.xml"]
+    for input_path in inputs:
+        Compare(input_path, ET.parse(input_path).getroot(), runs)
+    Compare("10000-deep chain", ChainDocument(10000), runs)
+
+if __name__ == "__main__":
+    main()
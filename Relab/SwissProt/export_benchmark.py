@@ -0,0 +1,76 @@
+import xml.etree.ElementTree as ET
+from xml.etree.ElementTree import Element
+import os
+import sys
+import time
+import resource
+import subprocess
+from xmllabel.relab import XmlLabeler, ReLab
+
+class TreeExport:
+    # Previous export: AddLabelsToXml rebuilds a second Element tree with a
+    # copy of every tag, attribute and text, ET.indent rewrites it for
+    # layout, and only then is it written out
+    @staticmethod
+    def ExportLabeledXml(node, output_path):
+        labeled_element = TreeExport.AddLabelsToXml(node)
+        tree = ET.ElementTree(labeled_element)
+        ET.indent(tree, space="  ", level=0)
+        tree.write(output_path, encoding='utf-8', xml_declaration=True)
+
+    @staticmethod
+    def AddLabelsToXml(node):
+        element = Element(node.Element.tag)
+        element.set("label", str(node.Label))
+        for key, value in node.Element.attrib.items():
+            element.set(key, value)
+        if node.Element.text and node.Element.text.strip():
+            element.text = node.Element.text
+        for child in node.Children:
+            element.append(TreeExport.AddLabelsToXml(child))
+        return element
+
+EXPORTS = {
+    "tree": TreeExport.ExportLabeledXml,
+    "stream": XmlLabeler.ExportLabeledXml,
+}
+
+def PeakRss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+
+def RunExport(mode, input_path, output_path):
+    # Runs in its own process so parsing and labeling are the only other
+    # contributors to the peak RSS, and they are the same for every mode
+    tree = ET.parse(input_path)
+    root_node = XmlLabeler.BuildTree(tree.getroot())
+    ReLab().LabelTree(root_node)
+
+    baseline = XmlLabeler.GetMemoryUsage()
+    start_time = time.perf_counter()
+    EXPORTS[mode](root_node, output_path)
+    elapsed_time = time.perf_counter() - start_time
+    peak = PeakRss()
+
+    size = os.path.getsize(output_path)
+    print(f"{mode}: {elapsed_time * 1000:.2f} ms, {size / elapsed_time / (1 << 20):.2f} MB/s, "
+          f"peak RSS {peak} KB (labeled tree {baseline} KB)")
+
+def main():
+    input_path = sys.argv[1] if len(sys.argv) > 1 else "SwissProt.xml"
+
+    if len(sys.argv) > 3:
+        RunExport(sys.argv[2], input_path, sys.argv[3])
+        return
+
+    dataset = os.path.splitext(os.path.basename(input_path))[0]
+    outputs = {}
+    for mode in EXPORTS:
+        outputs[mode] = f"export_{mode}_{dataset}.xml"
+        subprocess.run([sys.executable, __file__, input_path, mode, outputs[mode]], check=True)
+
+    with open(outputs["tree"], "rb") as tree_file, open(outputs["stream"], "rb") as stream_file:
+        same = tree_file.read() == stream_file.read()
+    print(f"Outputs identical: {same}")
+
+if __name__ == "__main__":
+    main()
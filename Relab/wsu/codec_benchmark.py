@@ -0,0 +1,49 @@
+import xml.etree.ElementTree as ET
+import sys
+import time
+import base64
+from xmllabel.relab import XmlLabeler, ReLab, ReLabCodec
+
+def Timed(function):
+    start_time = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start_time) * 1000  # ms
+
+def Compare(input_path):
+    root_node = XmlLabeler.BuildTree(ET.parse(input_path).getroot())
+    ReLab().LabelTree(root_node)
+    nodes = XmlLabeler.CollectNodes(root_node)
+
+    texts = [str(node.Label) for node in nodes]
+    packed = [node.Label.Pack() for node in nodes]
+    count = len(nodes)
+    print(f"{input_path}: {count} labels")
+    print(f"  size: text {sum(map(len, texts)) / count:.2f} chars, "
+          f"binary {sum(map(len, packed)) / count:.2f} bytes, "
+          f"hex {sum(len(p.hex()) for p in packed) / count:.2f} chars, "
+          f"base64 {sum(len(base64.b64encode(p)) for p in packed) / count:.2f} chars")
+
+    # Document order is the pre-order position; text sorts "[1,10,...]"
+    # before "[1,2,...]" and puts levels first
+    _, text_time = Timed(lambda: sorted(texts))
+    text_wrong = sum(1 for a, b in zip(texts, texts[1:]) if a > b)
+    _, ordinal_time = Timed(lambda: sorted(nodes, key=lambda node: node.Label.Ordinal))
+    ordered, bytes_time = Timed(lambda: sorted(packed))
+    print(f"  sort: text {text_time:.2f} ms ({text_wrong} adjacent pairs out of order), "
+          f"Ordinal {ordinal_time:.2f} ms, bytes {bytes_time:.2f} ms "
+          f"(document order: {ordered == packed})")
+
+    ancestor = nodes[1]
+    first, label_time = Timed(lambda: sum(1 for node in nodes if ReLab.IsAncestor(ancestor, node)))
+    key = packed[1]
+    second, bytes_time = Timed(lambda: sum(1 for p in packed if ReLabCodec.IsAncestor(key, p)))
+    print(f"  ancestor test: labels {label_time:.2f} ms, bytes {bytes_time:.2f} ms "
+          f"({first} and {second} descendants)")
+
+def main():
+    inputs = sys.argv[1:] if len(sys.argv) > 1 else ["wsu.xml"]
+    for input_path in inputs:
+        Compare(input_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import xml.etree.ElementTree as ET
+from xml.etree.ElementTree import Element
+import sys
+import time
+from xmllabel.core import XmlNode
+from xmllabel.relab import XmlLabeler, ReLab, ReLabLabel
+
+class RecursiveTraversal:
+    # Previous recursive versions of BuildTree, ReLab.AssignLabels and the
+    # by-descent path query, one Python call per node
+    @staticmethod
+    def BuildTree(element):
+        node = XmlNode(element.tag, element)
+        for child_element in element:
+            node.AddChild(RecursiveTraversal.BuildTree(child_element))
+        return node
+
+    @staticmethod
+    def QueryNodes(current, path_parts, level=0):
+        result = []
+        if level >= len(path_parts):
+            return result
+        if current.Name == path_parts[level] or path_parts[level] == "*":
+            if level == len(path_parts) - 1:
+                result.append(current)
+            else:
+                for child in current.Children:
+                    result.extend(RecursiveTraversal.QueryNodes(child, path_parts, level + 1))
+        return result
+
+class RecursiveReLab(ReLab):
+    def AssignLabels(self, node, level):
+        self.currentOrdinal += self.gap
+        node.Label = ReLabLabel(level, self.currentOrdinal, 0)
+        for child in node.Children:
+            self.AssignLabels(child, level + 1)
+        node.Label.RID = self.currentOrdinal
+
+def ChainDocument(depth):
+    root = Element("chain")
+    current = root
+    for _ in range(depth):
+        child = Element("node")
+        current.append(child)
+        current = child
+    return root
+
+def DeepestPath(root):
+    # Path of tag names down the first-child chain
+    parts = [root.tag]
+    while len(root):
+        root = root[0]
+        parts.append(root.tag)
+    return "/".join(parts)
+
+def Best(function, runs):
+    best = None
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        try:
+            result = function()
+        except RecursionError:
+            return None, "RecursionError"
+        elapsed_time = (time.perf_counter() - start_time) * 1000  # ms
+        best = elapsed_time if best is None else min(best, elapsed_time)
+    return result, f"{best:.2f} ms"
+
+def Compare(name, element, runs):
+    path = DeepestPath(element)
+    print(f"{name}:")
+    for kind, build, relab, query in (
+            ("recursive", RecursiveTraversal.BuildTree, RecursiveReLab(),
+             lambda root: RecursiveTraversal.QueryNodes(root, path.split("/"))),
+            ("iterative", XmlLabeler.BuildTree, ReLab(),
+             lambda root: XmlLabeler.QueryNodes(root, path))):
+        root, build_time = Best(lambda: build(element), runs)
+        if root is None:
+            print(f"  {kind}: BuildTree {build_time}")
+            continue
+        _, label_time = Best(lambda: relab.LabelTree(root), runs)
+        result, query_time = Best(lambda: query(root), runs)
+        print(f"  {kind}: BuildTree {build_time}, LabelTree {label_time}, "
+              f"QueryNodes {query_time} ({len(result or [])} nodes)")
+
+def main():
+    runs = 5
+    inputs = sys.argv[1:] if len(sys.argv) > 1 else ["wsu.xml"]
+    for input_path in inputs:
+        Compare(input_path, ET.parse(input_path).getroot(), runs)
+    Compare("10000-deep chain", ChainDocument(10000), runs)
+
+if __name__ == "__main__":
+    main()
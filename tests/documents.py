@@ -0,0 +1,82 @@
+import random
+import xml.etree.ElementTree as ET
+from xmllabel.core import XmlLabeler, TagIndex, PathQuery
+from xmllabel.synthetic import TreeShape
+
+# (scheme name, gap) of every labeling the tests run
+LABELINGS = [("dewey", 1), ("dewey", 4), ("prime", 1), ("relab", 1), ("relab", 4)]
+
+def RandomDocument(nodes, seed=0):
+    # Synthetic element tree with a handful of tags, short texts and a k
+    # attribute on some elements, so predicates both match and miss
+    rng = random.Random(seed)
+    root = TreeShape(nodes, fanout="uniform:1-5", tags=5, seed=seed).BuildTree()
+    for element in root.iter():
+        if element.text is not None:
+            element.text = rng.choice(["x", "y", " z "])
+        if rng.random() < 0.3:
+            element.set("k", rng.choice("12"))
+    return root
+
+def WriteDocument(root, path):
+    ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+
+def Chain(depth):
+    # Document of depth nested elements, as text: ElementTree serializes
+    # recursively
+    links = "".join(f'<link n="{i}">' for i in range(depth - 1))
+    return f"<chain>{links}end{'</link>' * (depth - 1)}</chain>"
+
+def NaiveQuery(root, path):
+    # Evaluates a path step by step over Children, without labels
+    nodes = XmlLabeler.CollectNodes(root)
+    order = {id(node): i for i, node in enumerate(nodes)}
+    context = []
+    for i, (axis, tag, predicates) in enumerate(PathQuery.Parse(path)):
+        if i == 0:
+            candidates = [root] if axis == "child" else nodes
+        elif axis == "child":
+            candidates = [child for node in context for child in node.Children]
+        else:
+            candidates = [descendant for node in context for descendant in XmlLabeler.CollectNodes(node)[1:]]
+        candidates = {id(node): node for node in candidates if tag in ("*", node.Name)}
+        candidates = sorted(candidates.values(), key=lambda node: order[id(node)])
+        for kind, name, value in predicates:
+            if kind == "position":
+                counts = {}
+                kept = []
+                for node in candidates:
+                    counts[id(node.Parent)] = counts.get(id(node.Parent), 0) + 1
+                    if counts[id(node.Parent)] == name:
+                        kept.append(node)
+                candidates = kept
+            elif kind == "attribute":
+                candidates = [node for node in candidates if name in node.Element.attrib
+                              and (value is None or node.Element.get(name) == value)]
+            elif kind == "text":
+                candidates = [node for node in candidates if (node.Element.text or "").strip() == value]
+            else:
+                candidates = [node for node in candidates
+                              if any(child.Name == name and (value is None or (child.Element.text or "").strip() == value)
+                                     for child in node.Children)]
+        context = candidates
+    return context
+
+def CheckLabels(scheme, root):
+    # Labels follow document order, and the ancestor and parent tests agree
+    # with the tree for every pair of nodes
+    nodes = XmlLabeler.CollectNodes(root)
+    query = scheme.PathQuery(TagIndex.FromTree(root))
+    keys = [query.OrderKey(node) for node in nodes]
+    assert all(a < b for a, b in zip(keys, keys[1:]))
+    for b in nodes:
+        ancestors = set()
+        parent = b.Parent
+        while parent is not None:
+            ancestors.add(id(parent))
+            parent = parent.Parent
+        for a in nodes:
+            isAncestor = id(a) in ancestors
+            assert scheme.IsAncestor(a, b) == isAncestor
+            if isAncestor:
+                assert query.IsParent(a, b) == (b.Parent is a)
@@ -0,0 +1,59 @@
+import random
+import pytest
+from fractions import Fraction
+from xmllabel import Varint
+from xmllabel.prime import DeweyCodec
+from xmllabel.relab import ReLabCodec, ReLabLabel
+
+def RandomComponent(rng):
+    ordinal = rng.choice([rng.randrange(300), rng.randrange(1 << 40)])
+    if rng.random() < 0.3:
+        ordinal += Fraction(rng.randrange(1, 1 << 6) | 1, 1 << rng.randrange(1, 7))
+    return ordinal
+
+def test_varint_order_and_round_trip():
+    values = sorted({0, 1, 127, 128, 1 << 14, (1 << 64) - 1} | {random.Random(1).randrange(1 << 64) for _ in range(500)})
+    encoded = [Varint.Encode(value) for value in values]
+    assert encoded == sorted(encoded)
+    for value, data in zip(values, encoded):
+        assert Varint.Size(data[0]) == len(data)
+        assert Varint.Decode(data) == value
+    for value in (-1, 1 << 64):
+        with pytest.raises(ValueError):
+            Varint.Encode(value)
+
+def test_dewey_codec_order_and_round_trip():
+    rng = random.Random(2)
+    labels = {tuple(RandomComponent(rng) for _ in range(rng.randrange(6))) for _ in range(2000)}
+    labels = sorted(labels)
+    encoded = [DeweyCodec.Encode(label) for label in labels]
+    assert encoded == sorted(encoded)
+    for label, data in zip(labels, encoded):
+        assert DeweyCodec.Decode(data) == label
+        if label:
+            assert DeweyCodec.Parent(data) == DeweyCodec.Encode(label[:-1])
+            assert DeweyCodec.IsParent(DeweyCodec.Parent(data), data)
+    for a, b in zip(labels, labels[1:]):
+        ancestor = len(a) < len(b) and b[:len(a)] == a
+        assert DeweyCodec.IsAncestor(DeweyCodec.Encode(a), DeweyCodec.Encode(b)) == ancestor
+
+def test_dewey_codec_rejects_non_dyadic_ordinals():
+    with pytest.raises(ValueError):
+        DeweyCodec.EncodeComponent(Fraction(1, 3))
+    with pytest.raises(ValueError):
+        DeweyCodec.EncodeComponent(-1)
+
+def test_relab_codec_order_and_round_trip():
+    rng = random.Random(3)
+    # Ordinals are unique within a document
+    ordinals = sorted(set(rng.sample(range(1000), 300)) | {rng.randrange(1 << 62) for _ in range(700)})
+    labels = [ReLabLabel(rng.randrange(50), ordinal, ordinal + rng.choice([0, rng.randrange(1 << 20)]))
+              for ordinal in ordinals]
+    encoded = [ReLabCodec.Encode(label) for label in labels]
+    assert encoded == sorted(encoded)
+    for label, data in zip(labels, encoded):
+        decoded = ReLabCodec.Decode(data)
+        assert (decoded.Level, decoded.Ordinal, decoded.RID) == (label.Level, label.Ordinal, label.RID)
+    for a, b in zip(labels, labels[1:]):
+        ancestor = a.Ordinal < b.Ordinal <= a.RID
+        assert ReLabCodec.IsAncestor(ReLabCodec.Encode(a), ReLabCodec.Encode(b)) == ancestor
@@ -0,0 +1,27 @@
+import xml.etree.ElementTree as ET
+import pytest
+from decimal import Decimal
+from xmllabel import SCHEMES
+from xmllabel.core import XmlLabeler
+from .documents import LABELINGS, Chain
+from .test_modes import CheckModes
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_deep_document(tmp_path, name, gap):
+    labeled = CheckModes(tmp_path, name, gap, Chain(1500))
+    assert labeled.count(b"<link") == 1499
+
+    scheme = SCHEMES[name](gap)
+    root = XmlLabeler.BuildTree(ET.fromstring(Chain(1500)))
+    scheme.LabelTree(root)
+    nodes = XmlLabeler.CollectNodes(root)
+    query = scheme.PathQuery(scheme.TagIndex(root))
+    assert scheme.IsAncestor(root, nodes[-1]) and not scheme.IsAncestor(nodes[-1], root)
+    assert query.IsParent(nodes[-2], nodes[-1])
+    assert query.OrderKey(nodes[-2]) < query.OrderKey(nodes[-1])
+    assert scheme.Query(root, "//link[@n='1497']/link", scheme.TagIndex(root)) == [nodes[-1]]
+    text = str(nodes[-1].Label)
+    if name == "prime":
+        # Far past int.__str__'s 4300 digit limit
+        assert len(text) > 4300 and text.isdigit()
+        assert Decimal(text) == Decimal(nodes[-1].Label.Value)
@@ -0,0 +1,62 @@
+import pytest
+from xmllabel import LabelIndex, SCHEMES
+from xmllabel.cli import main
+from xmllabel.core import XmlLabeler
+from .documents import LABELINGS, RandomDocument, WriteDocument
+from .test_modes import MODES, NestedRecords
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_label_index_round_trip(tmp_path, name, gap):
+    source = tmp_path / "document.xml"
+    WriteDocument(RandomDocument(300, seed=4), source)
+    element = XmlLabeler.Parse(source).getroot()
+    root = XmlLabeler.BuildTree(element)
+    SCHEMES[name](gap).LabelTree(root)
+    starts, ends, namespaces = XmlLabeler.ElementOffsets(source)
+    offsets = dict(zip(element.iter(), zip(starts, ends)))
+    index_path = str(tmp_path / "document.idx")
+    nodes = XmlLabeler.CollectNodes(root)
+    assert LabelIndex.Write(index_path, root, offsets, str(source), namespaces) == len(nodes)
+
+    index = LabelIndex(index_path)
+    try:
+        assert len(index) == len(nodes)
+        for node in nodes:
+            fetched = index.Fetch(node.Label)
+            assert fetched.tag == node.Name and fetched.attrib == node.Element.attrib
+        assert sorted(index.WithTag("t0")) == sorted(index.Find(node.Label.Pack()) for node in nodes
+                                                     if node.Name == "t0")
+        assert index.Find(b"\xff" * 40) == -1
+    finally:
+        index.Close()
+
+def test_fetch_resolves_entities_of_the_internal_subset(tmp_path):
+    source = tmp_path / "document.xml"
+    source.write_bytes(b'<?xml version="1.0" encoding="iso-8859-1"?>\n'
+                       b'<!DOCTYPE r [<!ENTITY e "ent">]>\n<r><a>\xe9</a><b>&e;</b></r>')
+    element = XmlLabeler.Parse(source).getroot()
+    root = XmlLabeler.BuildTree(element)
+    SCHEMES["dewey"](1).LabelTree(root)
+    starts, ends, namespaces = XmlLabeler.ElementOffsets(source)
+    index_path = str(tmp_path / "document.idx")
+    LabelIndex.Write(index_path, root, dict(zip(element.iter(), zip(starts, ends))), str(source), namespaces)
+
+    index = LabelIndex(index_path)
+    try:
+        assert [index.Fetch(child.Label).text for child in root.Children] == ["\xe9", "ent"]
+    finally:
+        index.Close()
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_every_mode_writes_the_same_index(tmp_path, name, gap):
+    source = str(tmp_path / "document.xml")
+    WriteDocument(NestedRecords(200, seed=12), source)
+    indexes = {}
+    for mode in MODES:
+        output = str(tmp_path / f"{mode}.xml")
+        main(["label", source, "-o", output, "--scheme", name, "--gap", str(gap), "--mode", mode,
+              "--workers", "3", "--index"])
+        with open(output + ".idx", "rb") as file:
+            indexes[mode] = file.read()
+    for mode in MODES:
+        assert indexes[mode] == indexes["tree"], mode
@@ -0,0 +1,35 @@
+import pytest
+from xmllabel import SCHEMES, TagIndex
+from xmllabel.core import XmlLabeler
+from .documents import LABELINGS, RandomDocument
+
+def NaivePairs(root, ancestorTag, descendantTag, childOnly):
+    # (ancestor, descendant) pairs by walking Children, in descendant order
+    pairs = []
+    for node in XmlLabeler.CollectNodes(root):
+        if descendantTag not in ("*", node.Name):
+            continue
+        ancestors = []
+        parent = node.Parent
+        while parent is not None and not (childOnly and ancestors):
+            ancestors.append(parent)
+            parent = parent.Parent
+        pairs.extend((ancestor, node) for ancestor in reversed(ancestors) if ancestorTag in ("*", ancestor.Name))
+    return pairs
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+@pytest.mark.parametrize("childOnly", [False, True])
+def test_join_pairs_match_naive_walk(name, gap, childOnly):
+    scheme = SCHEMES[name](gap)
+    for seed in range(3):
+        element = RandomDocument(400, seed)
+        root = XmlLabeler.BuildTree(element)
+        scheme.LabelTree(root)
+        store = scheme.BuildStore(element)
+        scheme.LabelStore(store)
+        storeIndex = TagIndex.FromStore(store)
+        for ancestorTag, descendantTag in [("t0", "t1"), ("t1", "t1"), ("synthetic", "t2"), ("*", "t3"), ("t2", "*")]:
+            expected = NaivePairs(root, ancestorTag, descendantTag, childOnly)
+            assert scheme.Join(root, ancestorTag, descendantTag, childOnly) == expected
+            pairs = scheme.Join(store.Node(0), ancestorTag, descendantTag, childOnly, storeIndex)
+            assert [(a.Element, d.Element) for a, d in pairs] == [(a.Element, d.Element) for a, d in expected]
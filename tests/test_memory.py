@@ -0,0 +1,41 @@
+import tracemalloc
+from xmllabel import MemoryTracker, Profiler
+
+def test_memory_tracker_phases():
+    assert not tracemalloc.is_tracing()
+    memory = MemoryTracker()
+    with memory.Phase("outer"):
+        with memory.Phase("inner"):
+            held = [bytearray(1 << 16) for _ in range(8)]
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+    net, peak = memory.Phases["inner"]
+    assert net >= 8 << 16 and peak >= net
+    assert memory.Phases["outer"][1] >= peak
+    del held
+
+def test_memory_tracker_leaves_caller_tracing_on():
+    tracemalloc.start()
+    try:
+        memory = MemoryTracker()
+        with memory.Phase("phase"):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+def test_disabled_memory_tracker_does_not_trace():
+    memory = MemoryTracker(enabled=False)
+    with memory.Phase("phase"):
+        assert not tracemalloc.is_tracing()
+    assert memory.Stop() == (0, 0) and memory.Phases == {}
+
+def test_profiler_report_columns(capsys):
+    profiler = Profiler(enabled=True)
+    for name in ("label", "insert"):
+        with profiler.Span(name):
+            profiler.Count(name, 3, 2)
+    profiler.Report()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("Profile label: 1 calls") and "2 labels," in lines[0]
+    assert "2 labels touched," in lines[1] and lines[1].endswith("net blocks")
@@ -0,0 +1,81 @@
+import random
+import xml.etree.ElementTree as ET
+import pytest
+from xmllabel import SCHEMES
+from xmllabel.core import XmlLabeler
+from .documents import LABELINGS, RandomDocument, WriteDocument
+
+MODES = ["tree", "store", "parallel", "stream", "chunked"]
+
+def LabelDocument(scheme, mode, source, output):
+    # Label source to output the way `xmllabel label --mode mode` does; the
+    # chunked labeler may not fall back to streaming
+    if mode == "stream":
+        return scheme.StreamLabeler().LabelFile(source, output)
+    if mode == "chunked":
+        return scheme.ChunkedLabeler(4).LabelRanges(source, output, "  ", "text")
+    element = XmlLabeler.Parse(source).getroot()
+    if mode == "tree":
+        root = XmlLabeler.BuildTree(element)
+        scheme.LabelTree(root)
+        return XmlLabeler.ExportLabeledXml(root, output)
+    store = scheme.BuildStore(element)
+    scheme.LabelStore(store, parallel=mode == "parallel", workers=3)
+    return XmlLabeler.ExportLabeledXml(store.Node(0), output)
+
+def CheckModes(tmp_path, name, gap, document, modes=MODES):
+    # Every mode writes the same labeled document (text or an element tree)
+    # as tree mode
+    source = str(tmp_path / "document.xml")
+    if isinstance(document, str):
+        with open(source, "w", encoding="utf-8") as file:
+            file.write(document)
+        document = ET.fromstring(document)
+    else:
+        WriteDocument(document, source)
+    count = len(list(document.iter()))
+    outputs = {}
+    for mode in modes:
+        output = str(tmp_path / f"{mode}.xml")
+        assert LabelDocument(SCHEMES[name](gap), mode, source, output) == count, mode
+        with open(output, "rb") as file:
+            outputs[mode] = file.read()
+    for mode in modes:
+        assert outputs[mode] == outputs["tree"], mode
+    return outputs["tree"]
+
+def NestedRecords(records, seed=0):
+    # Records of one tag that hold records of the same tag further down, so
+    # Split cuts ranges inside records
+    rng = random.Random(seed)
+    root = ET.Element("root")
+    for i in range(records):
+        record = ET.SubElement(root, "r", id=str(i))
+        element = record
+        for _ in range(rng.randrange(4)):
+            element = ET.SubElement(element, rng.choice(["r", "x"]))
+            ET.SubElement(element, "r").text = "nested"
+        if rng.random() < 0.3:
+            ET.SubElement(record, "r")
+    return root
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_modes_agree(tmp_path, name, gap):
+    # A random document is not a record dump, so chunked mode is left out
+    CheckModes(tmp_path, name, gap, RandomDocument(500, seed=8), MODES[:-1])
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_nested_records(tmp_path, name, gap):
+    CheckModes(tmp_path, name, gap, NestedRecords(300, seed=9))
+    CheckModes(tmp_path, name, gap, "<root><r><r/></r><r/></root>")
+
+def test_prime_groups_merge_across_chunks():
+    # Three workers cut two SC groups at chunk boundaries here; the joined
+    # groups and SC values match sequential labeling
+    element = NestedRecords(100, seed=4)
+    tree = SCHEMES["prime"]()
+    tree.LabelTree(XmlLabeler.BuildTree(element))
+    parallel = SCHEMES["prime"]()
+    parallel.LabelStore(parallel.BuildStore(element), parallel=True, workers=3)
+    assert parallel.Labeler.groups == tree.Labeler.groups
+    assert parallel.Labeler.scValues == tree.Labeler.scValues
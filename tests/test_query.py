@@ -0,0 +1,69 @@
+import xml.etree.ElementTree as ET
+import pytest
+from xmllabel import SCHEMES, TagIndex, PathQuery
+from xmllabel.core import XmlLabeler
+from xmllabel.relab import XmlLabeler as ReLabXmlLabeler
+from .documents import LABELINGS, RandomDocument, NaiveQuery
+
+PATHS = [
+    "/synthetic",
+    "/t0",
+    "//t0",
+    "//*",
+    "/synthetic/t1",
+    "//t0/t1",
+    "//t0//t2",
+    "/synthetic//t1/*",
+    "//t1[1]",
+    "//*[2]",
+    "//t0[2]/t1",
+    "//t1[@k='1']",
+    "//t1[@k]",
+    "//t0[@k='1'][2]",
+    "//t0[t1]",
+    "//t0[t1='x']//t2",
+    "//t2[text()='z']",
+    "/synthetic//*[@k='2']/t0",
+    "//t3/t3/t3",
+]
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_queries_match_naive_evaluation(name, gap):
+    scheme = SCHEMES[name](gap)
+    for seed in range(3):
+        root = XmlLabeler.BuildTree(RandomDocument(400, seed))
+        scheme.LabelTree(root)
+        index = scheme.TagIndex(root)
+        for path in PATHS:
+            assert scheme.Query(root, path, index) == NaiveQuery(root, path), path
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+@pytest.mark.parametrize("parallel", [False, True])
+def test_store_queries_match_tree_queries(name, gap, parallel):
+    scheme = SCHEMES[name](gap)
+    element = RandomDocument(400, seed=5)
+    root = XmlLabeler.BuildTree(element)
+    scheme.LabelTree(root)
+    store = scheme.BuildStore(element)
+    scheme.LabelStore(store, parallel=parallel, workers=3)
+    index = TagIndex.FromStore(store)
+    for path in PATHS:
+        expected = [node.Element for node in NaiveQuery(root, path)]
+        assert [node.Element for node in scheme.Query(store.Node(0), path, index)] == expected, path
+
+@pytest.mark.parametrize("path", ["", "/", "//", "a//", "[1]", "a/[1]", "a[b", "a[1]x", "a///b", "a[@b=c]"])
+def test_malformed_paths_are_rejected(path):
+    with pytest.raises(ValueError):
+        PathQuery.Parse(path)
+
+def test_relab_queries_without_an_index():
+    # Child-only paths descend the tree, the rest build an index
+    root = XmlLabeler.BuildTree(RandomDocument(400, seed=4))
+    SCHEMES["relab"](1).LabelTree(root)
+    for path in PATHS:
+        assert ReLabXmlLabeler.QueryNodes(root, path) == NaiveQuery(root, path), path
+    root = XmlLabeler.BuildTree(ET.fromstring("<a><b><c/></b><b/></a>"))
+    assert ReLabXmlLabeler.QueryNodes(root, "/a/b") == root.Children
+    assert ReLabXmlLabeler.QueryNodes(root, "a/b/c") == root.Children[0].Children
+    with pytest.raises(ValueError):
+        ReLabXmlLabeler.QueryNodes(root, "a/b/")
@@ -0,0 +1,27 @@
+from xmllabel.synthetic import TreeShape
+
+def LeafDepths(shape):
+    return [depth for depth, tag, text, leaf in shape.Events() if leaf]
+
+def test_depth_distribution_varies_branch_depths():
+    fixed = TreeShape(3000, fanout="uniform:2-6", depth="fixed:4", seed=1)
+    assert fixed.Statistics()["nodes"] == 3000
+    assert max(LeafDepths(fixed)) == 4
+    # Budgets run out before some branches reach their depth
+    mixed = TreeShape(3000, fanout="uniform:4-12", depth="uniform:2-9", seed=1)
+    depths = {}
+    for depth, tag, text, leaf in mixed.Events():
+        if depth == 1:
+            branch = depths.setdefault(len(depths), [])
+        elif leaf:
+            branch.append(depth)
+    deepest = [max(branch) for branch in depths.values() if branch]
+    assert min(deepest) <= 3 and 6 <= max(deepest) <= 9
+    capped = TreeShape(3000, fanout="uniform:2-6", max_depth=5, depth="uniform:2-9", seed=1)
+    assert max(LeafDepths(capped)) <= 5
+
+def test_shape_without_depth_is_unchanged():
+    # The depth draws only happen with a depth distribution, so seeds keep
+    # giving the documents they always did
+    shape = TreeShape(500, fanout="uniform:1-5", tags=5, seed=3)
+    assert list(shape.Events()) == list(TreeShape(500, "uniform:1-5", None, None, tags=5, seed=3).Events())
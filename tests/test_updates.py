@@ -0,0 +1,91 @@
+import copy
+import random
+import xml.etree.ElementTree as ET
+import pytest
+from xmllabel import SCHEMES
+from xmllabel.core import XmlLabeler, TagIndex
+from .documents import LABELINGS, RandomDocument, NaiveQuery, CheckLabels
+from .test_query import PATHS
+
+def Subtree(rng, element):
+    # Fresh XmlNode tree over a copy of one of element's small subtrees
+    choices = [child for child in element.iter() if len(child) < 4]
+    return XmlLabeler.BuildTree(copy.deepcopy(rng.choice(choices)))
+
+def RandomUpdates(scheme, root, element, rng, steps, check=None):
+    # Random inserts, batch inserts, deletes and moves through the scheme,
+    # calling check every 20 steps
+    for step in range(steps):
+        nodes = XmlLabeler.CollectNodes(root)
+        operation = rng.choice(["insert", "insert", "batch", "delete", "move"])
+        if operation == "insert":
+            parent = rng.choice(nodes)
+            scheme.Insert(parent, rng.randint(0, len(parent.Children)), Subtree(rng, element))
+        elif operation == "batch":
+            parent = rng.choice(nodes)
+            count = rng.randint(1, 4)
+            positions = sorted(rng.randint(0, len(parent.Children)) for _ in range(count))
+            scheme.InsertMany(parent, [Subtree(rng, element) for _ in range(count)], positions)
+        elif operation == "delete" and len(nodes) > 40:
+            scheme.Delete(rng.choice(nodes[1:]))
+        elif operation == "move":
+            node = rng.choice(nodes[1:])
+            inside = {id(descendant) for descendant in XmlLabeler.CollectNodes(node)}
+            parent = rng.choice([other for other in nodes if id(other) not in inside])
+            scheme.Move(node, parent, rng.randint(0, len(parent.Children) - (node.Parent is parent)))
+        if check is not None and step % 20 == 19:
+            check()
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_labels_hold_after_random_updates(name, gap):
+    rng = random.Random(6)
+    scheme = SCHEMES[name](gap)
+    element = RandomDocument(120, seed=6)
+    root = XmlLabeler.BuildTree(element)
+    scheme.LabelTree(root)
+    RandomUpdates(scheme, root, element, rng, 120, lambda: CheckLabels(scheme, root))
+    CheckLabels(scheme, root)
+    index = TagIndex.FromTree(root)
+    for path in PATHS:
+        assert scheme.Query(root, path, index) == NaiveQuery(root, path), path
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_kept_index_follows_updates(name, gap):
+    # The index the scheme keeps through its updates holds the same nodes in
+    # the same order as one rebuilt from the tree
+    rng = random.Random(10)
+    scheme = SCHEMES[name](gap)
+    element = RandomDocument(120, seed=10)
+    root = XmlLabeler.BuildTree(element)
+    scheme.LabelTree(root)
+    kept = scheme.TagIndex(root)
+
+    def Check():
+        assert scheme.TagIndex(root) is kept
+        fresh = TagIndex.FromTree(root)
+        assert [id(node) for node in kept.AllNodes] == [id(node) for node in fresh.AllNodes]
+        for tag in set(kept.Tags) | set(fresh.Tags):
+            assert [id(node) for node in kept.Get(tag)] == [id(node) for node in fresh.Get(tag)], tag
+
+    RandomUpdates(scheme, root, element, rng, 200, Check)
+    Check()
+    for path in PATHS:
+        assert scheme.Query(root, path) == NaiveQuery(root, path), path
+
+@pytest.mark.parametrize("name, gap", LABELINGS)
+def test_repeated_inserts_at_one_place(name, gap):
+    # Inserts that keep hitting the same gap, before the first child and at
+    # the end of a deep node
+    scheme = SCHEMES[name](gap)
+    element = RandomDocument(60, seed=7)
+    root = XmlLabeler.BuildTree(element)
+    scheme.LabelTree(root)
+    deep = root
+    while deep.Children:
+        deep = deep.Children[-1]
+    payload = ET.fromstring("<t0 k='1'><t1>x</t1></t0>")
+    for _ in range(40):
+        scheme.Insert(root, 1, XmlLabeler.BuildTree(copy.deepcopy(payload)))
+        scheme.Insert(root, 0, XmlLabeler.BuildTree(copy.deepcopy(payload)))
+        scheme.Insert(deep, len(deep.Children), XmlLabeler.BuildTree(copy.deepcopy(payload)))
+    CheckLabels(scheme, root)
@@ -0,0 +1,3 @@
+from .core import (XmlNode, TreeWalker, XmlLabeler, LabeledXmlWriter, LabelIndex, MemoryTracker, Profiler, PROFILER,
+                   DocumentStore, StoreNode, TagIndex, PathQuery, ChunkedLabeler, Varint)
+from .schemes import Scheme, DeweyScheme, PrimeScheme, ReLabScheme, SCHEMES
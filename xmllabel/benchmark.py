@@ -0,0 +1,256 @@
+import xml.etree.ElementTree as ET
+import argparse
+import csv
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+from .core import XmlLabeler, MemoryTracker
+from .schemes import SCHEMES
+from .synthetic import TreeShape, UpdateTrace
+
+# The datasets ship with the source checkout, next to the package; an
+# installed package has none there, so --datasets or explicit inputs are needed
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = ("wsu", "nasa", "SwissProt")
+
+# Benchmarked variants: scheme name and ordinal gap
+VARIANTS = {
+    "dewey": ("dewey", 1),
+    "dewey-gap16": ("dewey", 16),
+    "prime": ("prime", 1),
+    "relab": ("relab", 1),
+    "relab-gap16": ("relab", 16),
+}
+
+FIELDS = ("dataset", "nodes", "scheme", "phase", "runs", "median_ms", "p95_ms", "min_ms",
+          "net_kb", "peak_kb", "bytes_per_node", "touched", "results", "label_bytes_mean", "label_bytes_max",
+          "label_text_mean", "label_deep_bytes")
+
+def DefaultInputs(root=ROOT):
+    # The datasets sit next to whichever family's script uses them
+    inputs = []
+    for dataset in DATASETS:
+        for family in ("PrimeFactorization", "Relab"):
+            path = os.path.join(root, family, dataset, f"{dataset}.xml")
+            if os.path.exists(path):
+                inputs.append((dataset, path))
+                break
+        else:
+            print(f"Skipping {dataset}: {dataset}.xml not found", file=sys.stderr)
+    return inputs
+
+def Percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+def Measure(setup, action, runs, warmup):
+    # Times action(state) on a fresh setup() state per run, with
+    # perf_counter_ns; warmup runs are discarded. One more run inside a
+    # MemoryTracker phase gives the net allocation and the peak on top of
+    # the setup's
+    times = []
+    result = None
+    for i in range(warmup + runs):
+        state = setup()
+        start = time.perf_counter_ns()
+        result = action(state)
+        elapsed = time.perf_counter_ns() - start
+        if i >= warmup:
+            times.append(elapsed / 1e6)  # ms
+
+    memory = MemoryTracker()
+    state = setup()
+    with memory.Phase("run"):
+        # Held to the end of the phase, so what it allocated counts as net
+        kept = action(state)
+    net, peak = memory.Phases["run"]
+    del kept
+
+    times.sort()
+    return {"runs": runs, "median_ms": statistics.median(times), "p95_ms": Percentile(times, 0.95),
+            "min_ms": times[0], "net_kb": net / 1024, "peak_kb": peak / 1024}, result
+
+def LabelSizes(root, deep_size=False):
+    # Packed binary size and text length of every label in the tree, and the
+    # deep size of the label objects themselves (shared parts counted once)
+    nodes = XmlLabeler.CollectNodes(root)
+    packed = [len(node.Label.Pack()) for node in nodes]
+    sizes = {"label_bytes_mean": sum(packed) / len(packed), "label_bytes_max": max(packed),
+             "label_text_mean": sum(len(str(node.Label)) for node in nodes) / len(nodes)}
+    if deep_size:
+        sizes["label_deep_bytes"] = MemoryTracker.DeepSize([node.Label for node in nodes]) / len(nodes)
+    return sizes
+
+def Payload(element, limit=64):
+    # A record to insert copies of: the smallest of the root's first
+    # children in the datasets, further down in generated trees, until it
+    # has at most limit elements
+    def size(child):
+        return sum(1 for _ in child.iter())
+
+    while len(element) and size(element) > limit:
+        element = min(element[:16], key=size)
+    return element
+
+def JoinTags(element):
+    # Default ancestor and descendant tags to join: the Payload record's tag
+    # and the commonest tag below it
+    record = Payload(element)
+    counts = {}
+    for child in record.iter():
+        if child is not record:
+            counts[child.tag] = counts.get(child.tag, 0) + 1
+    return record.tag, max(counts, key=counts.get) if counts else record.tag
+
+def Benchmark(dataset, element, variant, runs, warmup, inserts=0, skews=(), deep_size=False, join=None):
+    # build: XmlNode tree from the parsed document; label: the whole tree;
+    # query and join: the descendants of one tag below another (join, a
+    # pair of tags, default JoinTags) by the path query //a//d and every
+    # (a, d) pair by Scheme.Join, both over a prebuilt tag index;
+    # insert-end / insert-middle: one new subtree, a copy of Payload(element),
+    # on a freshly labeled tree, behind the root's last child or between its
+    # middle two; trace-<skew>: an UpdateTrace of `inserts` new subtrees
+    name, gap = VARIANTS[variant]
+    payload = Payload(element)
+    rows = []
+
+    stats, root = Measure(lambda: None, lambda _: XmlLabeler.BuildTree(element), runs, warmup)
+    count = len(XmlLabeler.CollectNodes(root))
+    rows.append(dict(stats, phase="build", bytes_per_node=stats["net_kb"] * 1024 / count))
+
+    def fresh():
+        return SCHEMES[name](gap), XmlLabeler.BuildTree(element)
+
+    def label(state):
+        scheme, root = state
+        scheme.LabelTree(root)
+        return root
+
+    stats, root = Measure(fresh, label, runs, warmup)
+    rows.append(dict(stats, phase="label", bytes_per_node=stats["net_kb"] * 1024 / count,
+                     **LabelSizes(root, deep_size)))
+
+    ancestorTag, descendantTag = join or JoinTags(element)
+
+    def indexed():
+        scheme, root = fresh()
+        scheme.LabelTree(root)
+        return scheme, root, scheme.TagIndex(root)
+
+    stats, result = Measure(indexed, lambda state: state[0].Query(state[1], f"//{ancestorTag}//{descendantTag}",
+                                                                  state[2]), runs, warmup)
+    rows.append(dict(stats, phase="query", results=len(result)))
+    stats, result = Measure(indexed, lambda state: state[0].Join(state[1], ancestorTag, descendantTag,
+                                                                 index=state[2]), runs, warmup)
+    rows.append(dict(stats, phase="join", results=len(result)))
+
+    def labeled():
+        scheme, root = fresh()
+        scheme.LabelTree(root)
+        return scheme, root, XmlLabeler.BuildTree(payload)
+
+    for phase, where in (("insert-end", lambda root: len(root.Children)),
+                         ("insert-middle", lambda root: len(root.Children) // 2)):
+        stats, touched = Measure(labeled, lambda state: state[0].Insert(state[1], where(state[1]), state[2]),
+                                 runs, warmup)
+        rows.append(dict(stats, phase=phase, touched=touched))
+
+    def traced(trace):
+        scheme, root, _ = labeled()
+        return scheme.Insert, XmlLabeler.CollectNodes(root), trace
+
+    for skew in skews if inserts else ():
+        trace = UpdateTrace.Generate(count, inserts, skew)
+        stats, touched = Measure(lambda: traced(trace),
+                                 lambda state: UpdateTrace.Apply(state[2], state[1], state[0],
+                                                                 lambda: XmlLabeler.BuildTree(payload)),
+                                 runs, warmup)
+        rows.append(dict(stats, phase=f"trace-{skew}", touched=touched))
+
+    return [dict(row, dataset=dataset, nodes=count, scheme=variant) for row in rows]
+
+def Print(row):
+    sizes = ""
+    if "label_bytes_mean" in row:
+        sizes = (f", labels {row['label_bytes_mean']:.2f} B mean / {row['label_bytes_max']} B max, "
+                 f"{row['label_text_mean']:.2f} chars")
+    if "label_deep_bytes" in row:
+        sizes += f", {row['label_deep_bytes']:.1f} B deep"
+    per_node = f" ({row['bytes_per_node']:.1f} B per node)" if "bytes_per_node" in row else ""
+    touched = f", {row['touched']} touched" if "touched" in row else ""
+    touched += f", {row['results']} results" if "results" in row else ""
+    print(f"  {row['scheme']:<12} {row['phase']:<14} median {row['median_ms']:9.2f} ms, "
+          f"p95 {row['p95_ms']:9.2f} ms, net {row['net_kb']:9.1f} KB{per_node}, "
+          f"peak {row['peak_kb']:9.1f} KB{touched}{sizes}")
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark every labeling scheme over the datasets")
+    parser.add_argument("inputs", nargs="*",
+                        help="XML files (default: wsu, nasa and SwissProt from the --datasets checkout)")
+    parser.add_argument("--datasets", default=ROOT, metavar="DIR",
+                        help="source checkout holding the datasets (default: the one the package runs from)")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[], metavar="NODES",
+                        help="also run generated trees of these sizes")
+    parser.add_argument("--fanout", default="uniform:2-12", help="fanout distribution of the generated trees")
+    parser.add_argument("--max-depth", type=int, help="depth cap of the generated trees")
+    parser.add_argument("--depth", help="distribution of the depth each record of the generated trees reaches")
+    parser.add_argument("--inserts", type=int, default=0, help="length of the update traces (default: none)")
+    parser.add_argument("--skews", default=",".join(UpdateTrace.SKEWS), help="comma-separated trace skews")
+    parser.add_argument("--schemes", default=",".join(VARIANTS), help=f"comma-separated variants of {', '.join(VARIANTS)}")
+    parser.add_argument("--join", metavar="ANCESTOR,DESCENDANT",
+                        help="tags of the query and join phases (default: a record tag and its commonest descendant)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--deep-size", action="store_true", help="measure the deep size of the labels")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--csv", help="write the results to this CSV file")
+    args = parser.parse_args(argv)
+
+    join = None
+    if args.join:
+        join = tuple(args.join.split(","))
+        if len(join) != 2 or not all(join):
+            parser.error(f"--join takes two comma-separated tags: {args.join}")
+    schemes = args.schemes.split(",")
+    for variant in schemes:
+        if variant not in VARIANTS:
+            parser.error(f"Unknown scheme variant: {variant}")
+    inputs = [(os.path.splitext(os.path.basename(path))[0], path) for path in args.inputs]
+    if not inputs:
+        inputs = DefaultInputs(args.datasets)
+        if not inputs and not args.synthetic:
+            parser.error(f"No datasets found under {args.datasets}; "
+                         f"pass XML files, --datasets DIR or --synthetic NODES")
+    documents = [(dataset, lambda path=path: ET.parse(path).getroot()) for dataset, path in inputs]
+    documents += [(f"synthetic-{count}",
+                   lambda count=count: TreeShape(count, args.fanout, args.max_depth, args.depth).BuildTree())
+                  for count in args.synthetic]
+
+    results = []
+    for dataset, load in documents:
+        element = load()
+        print(f"{dataset}:")
+        for scheme in schemes:
+            for row in Benchmark(dataset, element, scheme, args.runs, args.warmup, args.inserts,
+                                 args.skews.split(","), args.deep_size, join):
+                Print(row)
+                results.append(row)
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, "warmup": args.warmup,
+                       "results": results}, json_file, indent=2)
+        print(f"Results saved to {args.json}")
+    if args.csv:
+        with open(args.csv, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"Results saved to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import xml.etree.ElementTree as ET
+import argparse
+import os
+import sys
+import time
+from .core import XmlLabeler, LabelIndex, MemoryTracker, PROFILER
+from .schemes import SCHEMES
+from . import benchmark
+
+MODES = ("tree", "store", "parallel", "stream", "chunked")
+
+def Elapsed(start_time):
+    return (time.perf_counter() - start_time) * 1000  # ms
+
+def DefaultOutput(input_path):
+    return f"labeled_{os.path.basename(input_path)}"
+
+def LabeledTree(args, scheme, memory):
+    # Parse, build and label input_path as an XmlNode tree; returns the
+    # parsed root element and the labeled root node
+    start_time = time.perf_counter()
+    with memory.Phase("parse"):
+        element = XmlLabeler.Parse(args.input).getroot()
+    with memory.Phase("BuildTree"):
+        root_node = XmlLabeler.BuildTree(element)
+    parse_time = Elapsed(start_time)
+    start_time = time.perf_counter()
+    with memory.Phase("label"):
+        scheme.LabelTree(root_node)
+    print(f"Parse and BuildTree: {parse_time:.2f} ms, {scheme.Name} labeling: {Elapsed(start_time):.2f} ms")
+    return element, root_node
+
+def Label(args, scheme, memory):
+    output_path = args.output or DefaultOutput(args.input)
+    size = os.path.getsize(args.input) / (1 << 20)  # MB
+    start_time = time.perf_counter()
+    if args.mode == "stream":
+        with memory.Phase("stream"):
+            count = scheme.StreamLabeler().LabelFile(args.input, output_path, label_format=args.format)
+    elif args.mode == "chunked":
+        count = scheme.ChunkedLabeler(args.workers).LabelFile(args.input, output_path, label_format=args.format)
+    elif args.mode in ("store", "parallel"):
+        with memory.Phase("parse"):
+            element = XmlLabeler.Parse(args.input).getroot()
+        with memory.Phase("store"):
+            store = scheme.BuildStore(element)
+            scheme.LabelStore(store, parallel=args.mode == "parallel", workers=args.workers)
+        root_node = store.Node(0)
+        with memory.Phase("export"):
+            count = XmlLabeler.ExportLabeledXml(root_node, output_path, label_format=args.format)
+    else:
+        element, root_node = LabeledTree(args, scheme, memory)
+        with memory.Phase("export"):
+            count = XmlLabeler.ExportLabeledXml(root_node, output_path, label_format=args.format)
+    elapsed_time = Elapsed(start_time)
+    print(f"{count} elements labeled ({args.mode}) in {elapsed_time:.2f} ms, "
+          f"{size / elapsed_time * 1000:.2f} MB/s")
+    print(f"Labeled XML has been saved to {output_path}")
+
+    if args.index:
+        # Sidecar label index with every element's byte range in the input
+        index_path = output_path + ".idx"
+        starts, ends, namespaces = XmlLabeler.ElementOffsets(args.input)
+        if args.mode in ("stream", "chunked"):
+            # No tree was kept: the stream labeler hands out the labels these
+            # modes wrote once more, in document order like the offsets
+            labels = ((label.Pack(), element.tag) for event, element, label
+                      in scheme.StreamLabeler().Events(args.input) if event == "start")
+            entries = ((label, tag, start, end) for (label, tag), start, end in zip(labels, starts, ends))
+            records = LabelIndex.WriteEntries(index_path, entries, args.input, namespaces)
+        else:
+            offsets = dict(zip(element.iter(), zip(starts, ends)))
+            records = LabelIndex.Write(index_path, root_node, offsets, args.input, namespaces)
+        print(f"Label index with {records} records saved to {index_path}")
+    memory.Report(count)
+
+def Insert(args, scheme, memory):
+    element, root_node = LabeledTree(args, scheme, memory)
+    parents = scheme.Query(root_node, args.parent) if args.parent else [root_node]
+    if not parents:
+        raise SystemExit(f"No node matches {args.parent}")
+    if args.payload:
+        payload = ET.parse(args.payload).getroot()
+    else:
+        payload = args.payload_element if args.payload_element is not None else benchmark.Payload(element)
+    copies = [[XmlLabeler.BuildTree(payload) for _ in range(args.copies)] for _ in parents]
+
+    def position(parent):
+        # Index among the parent's current children; negative counts from
+        # the end, -1 (the default) appending
+        count = len(parent.Children)
+        return min(args.position, count) if args.position >= 0 else max(count + 1 + args.position, 0)
+
+    start_time = time.perf_counter()
+    touched = 0
+    with memory.Phase("insert"):
+        for parent, nodes in zip(parents, copies):
+            if args.batch:
+                touched += scheme.InsertMany(parent, nodes, [position(parent)] * len(nodes))
+            else:
+                for node in nodes:
+                    touched += scheme.Insert(parent, position(parent), node)
+    elapsed_time = Elapsed(start_time)
+    inserts = len(parents) * args.copies
+    print(f"{inserts} copies of <{payload.tag}> inserted under {len(parents)} nodes in {elapsed_time:.2f} ms "
+          f"({elapsed_time / inserts:.3f} ms each), {scheme.Touched} touched: {touched}")
+
+    if args.output:
+        with memory.Phase("export"):
+            XmlLabeler.ExportLabeledXml(root_node, args.output, label_format=args.format)
+        print(f"Labeled XML has been saved to {args.output}")
+    memory.Report(len(XmlLabeler.CollectNodes(root_node)))
+
+def Query(args, scheme, memory):
+    element, root_node = LabeledTree(args, scheme, memory)
+    index = scheme.TagIndex(root_node)
+    start_time = time.perf_counter()
+    with memory.Phase("query"):
+        result = scheme.Query(root_node, args.path, index)
+    print(f"Query {args.path}: {len(result)} nodes in {Elapsed(start_time):.2f} ms")
+    for node in result[:args.show]:
+        text = (node.Element.text or "").strip()
+        print(f"  {node.Label} <{node.Name}>{' ' + text if text else ''}")
+    memory.Report(len(XmlLabeler.CollectNodes(root_node)))
+
+def Join(args, scheme, memory):
+    element, root_node = LabeledTree(args, scheme, memory)
+    start_time = time.perf_counter()
+    index = scheme.TagIndex(root_node)
+    print(f"Tag index: {Elapsed(start_time):.2f} ms")
+    start_time = time.perf_counter()
+    with memory.Phase("join"):
+        pairs = scheme.Join(root_node, args.ancestor, args.descendant, args.child, index)
+    axis = "/" if args.child else "//"
+    print(f"Join {args.ancestor}{axis}{args.descendant}: {len(pairs)} pairs in {Elapsed(start_time):.2f} ms")
+    for ancestor, descendant in pairs[:args.show]:
+        print(f"  {ancestor.Label} <{ancestor.Name}>  {descendant.Label} <{descendant.Name}>")
+    memory.Report(len(XmlLabeler.CollectNodes(root_node)))
+
+COMMANDS = {"label": Label, "insert": Insert, "query": Query, "join": Join}
+
+def main(argv=None, payload=None):
+    # payload: element `insert` adds when --payload is not given (default:
+    # a record of the input)
+    parser = argparse.ArgumentParser(prog="xmllabel", description="Label XML documents for structural queries")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("input", help="XML file")
+    common.add_argument("--scheme", default="dewey", choices=SCHEMES)
+    common.add_argument("--gap", type=int, default=1, help="ordinal gap left between siblings (dewey, relab)")
+    common.add_argument("--format", default="text", choices=("text", "hex", "base64"),
+                        help="label format in the output")
+    common.add_argument("--memory", action="store_true", help="trace each phase's allocations (slows them down)")
+    common.add_argument("--profile", action="store_true", help="report time, nodes, labels and net memory blocks per phase")
+    common.add_argument("--pstats", metavar="PATH", help="also dump cProfile statistics of the phases to PATH")
+
+    label = commands.add_parser("label", parents=[common], help="label a document and write it out")
+    label.add_argument("-o", "--output", help="labeled XML to write (default: labeled_<input>)")
+    label.add_argument("--mode", default="tree", choices=MODES,
+                       help="XmlNode tree, columnar store (parallel: labeled in a process pool), "
+                            "one streaming pass, or byte ranges parsed in a process pool")
+    label.add_argument("--workers", type=int, help="process pool size for --mode parallel and chunked (default: one per CPU)")
+    label.add_argument("--index", action="store_true", help="also write a sidecar label index")
+
+    insert = commands.add_parser("insert", parents=[common], help="insert subtrees into a labeled document")
+    insert.add_argument("--payload", help="XML file whose root is inserted (default: a record of the input)")
+    insert.add_argument("--parent", help="path query for the parents (default: the root)")
+    insert.add_argument("--position", type=int, default=-1,
+                        help="child index to insert at, negative from the end (default: -1, append)")
+    insert.add_argument("--copies", type=int, default=1, help="copies inserted under every parent")
+    insert.add_argument("--batch", action="store_true", help="insert each parent's copies in one batch")
+    insert.add_argument("-o", "--output", help="labeled XML to write after the inserts")
+    insert.set_defaults(payload_element=payload)
+
+    query = commands.add_parser("query", parents=[common], help="run a path query on a labeled document")
+    query.add_argument("path", help="path such as //course[prefix='ACCTG']/title")
+    query.add_argument("--show", type=int, default=10, help="matches to print (default: 10)")
+
+    join = commands.add_parser("join", parents=[common], help="pair up the nodes of two tags by a structural join")
+    join.add_argument("ancestor", help="ancestor tag, or * for any")
+    join.add_argument("descendant", help="descendant tag, or * for any")
+    join.add_argument("--child", action="store_true", help="pair parents with children only")
+    join.add_argument("--show", type=int, default=10, help="pairs to print (default: 10)")
+
+    commands.add_parser("bench", add_help=False, help="benchmark the schemes (see xmllabel bench --help)")
+
+    args, rest = parser.parse_known_args(argv)
+    if args.command == "bench":
+        benchmark.main(rest, prog="xmllabel bench")
+        return
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    try:
+        scheme = SCHEMES[args.scheme](args.gap)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.profile or args.pstats:
+        PROFILER.Enable(args.pstats)
+    try:
+        COMMANDS[args.command](args, scheme, MemoryTracker(args.memory))
+    except (OSError, ValueError, ET.ParseError) as error:
+        # Unreadable or malformed input, or a path the query parser rejects
+        raise SystemExit(f"xmllabel {args.command}: {error}")
+    PROFILER.Report()
+
+def DatasetMain(dataset, scheme, payload, query, outputs, argv=None):
+    # Entry point of the dataset scripts: `script.py [command] [options]`
+    # runs the command (default: label) on dataset with scheme; query runs
+    # the script's query unless a path is given. outputs maps label and
+    # insert to the labeled XML they write next to the dataset unless -o is
+    # given; another --scheme than the script's adds its name to the file
+    argv = list(sys.argv[1:] if argv is None else argv)
+    command = argv.pop(0) if argv and argv[0] in COMMANDS else "label"
+    path = []
+    if command == "query":
+        path = [argv.pop(0) if argv and not argv[0].startswith("-") else query]
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("-o", "--output")
+    options.add_argument("--scheme", default=scheme)
+    chosen, _ = options.parse_known_args(argv)
+    output = []
+    if command in outputs and chosen.output is None:
+        base, ext = os.path.splitext(outputs[command])
+        name = base + ext if chosen.scheme == scheme else f"{base}_{chosen.scheme}{ext}"
+        output = ["-o", os.path.join(os.path.dirname(dataset), name)]
+    main([command, dataset, *path, "--scheme", scheme, *output, *argv], payload)
+
+if __name__ == "__main__":
+    main()
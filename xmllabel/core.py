@@ -0,0 +1,1267 @@
+import xml.etree.ElementTree as ET
+import xml.parsers.expat
+import time
+import os
+import sys
+import array
+import bisect
+import re
+import base64
+import struct
+import mmap
+import shutil
+import itertools
+import tempfile
+import tracemalloc
+import gc
+import types
+import cProfile
+import pstats
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+import psutil
+
+class XmlNode:
+    def __init__(self, name, element):
+        self.Name = name
+        self.Children = []
+        self.Label = None
+        self.Element = element
+        self.Parent = None
+    
+    def AddChild(self, child):
+        child.Parent = self
+        self.Children.append(child)
+
+    def InsertChild(self, index, child):
+        child.Parent = self
+        self.Children.insert(index, child)
+
+    def InsertChildren(self, index, children):
+        for child in children:
+            child.Parent = self
+        self.Children[index:index] = children
+
+    def RemoveChild(self, child):
+        self.Children.remove(child)
+        child.Parent = None
+
+class TreeWalker:
+    # Explicit-stack depth-first traversal shared by tree building, labeling,
+    # querying and export, so document depth is not bound by the recursion
+    # limit. enter(node, state, position) runs in pre-order with the value
+    # enter returned for the parent (`state` for the root) and the node's
+    # 1-based position among its siblings (0 for the root); returning None
+    # skips the node's subtree. leave(node, value) runs in post-order.
+    @staticmethod
+    def Walk(root, enter, leave=None, state=None, children=None):
+        if children is None:
+            children = TreeWalker.Children
+        rootValue = enter(root, state, 0)
+        if rootValue is None:
+            return None
+        stack = [(root, rootValue, enumerate(children(root), 1))]
+        while stack:
+            node, value, pending = stack[-1]
+            for position, child in pending:
+                childValue = enter(child, value, position)
+                if childValue is None:
+                    continue
+                grandchildren = children(child)
+                if grandchildren:
+                    stack.append((child, childValue, enumerate(grandchildren, 1)))
+                    break
+                # Leaves are finished on the spot instead of being stacked
+                if leave is not None:
+                    leave(child, childValue)
+            else:
+                stack.pop()
+                if leave is not None:
+                    leave(node, value)
+        return rootValue
+
+    @staticmethod
+    def Children(node):
+        return node.Children
+
+class XmlLabeler:
+    @staticmethod
+    def Parse(input_path):
+        # ET.parse as a profiled phase
+        with PROFILER.Span("parse"):
+            tree = ET.parse(input_path)
+        PROFILER.CountWalk("parse", lambda: sum(1 for _ in tree.iter()))
+        return tree
+
+    @staticmethod
+    def BuildTree(element, index=None):
+        # Explicit (element, node) stack; each popped element gets its child
+        # nodes in one pass and only children that have children of their own
+        # are pushed. Nodes are therefore not made in document order, so the
+        # index is filled afterwards from a pre-order collection
+        with PROFILER.Span("BuildTree"):
+            root = XmlNode(element.tag, element)
+            stack = [(element, root)] if len(element) else []
+            while stack:
+                current, node = stack.pop()
+                children = node.Children
+                for child in current:
+                    childNode = XmlNode(child.tag, child)
+                    childNode.Parent = node
+                    children.append(childNode)
+                    if len(child):
+                        stack.append((child, childNode))
+            if index is not None:
+                for node in XmlLabeler.CollectNodes(root):
+                    index.Add(node)
+        PROFILER.CountWalk("BuildTree", lambda: len(XmlLabeler.CollectNodes(root)))
+        return root
+
+    @staticmethod
+    def BuildStore(element, store=None):
+        # Pre-order, so store ids come out in document order; store is an
+        # empty DocumentStore of the scheme's kind (default: label objects)
+        if store is None:
+            store = DocumentStore()
+        stack = [(element, -1)]
+        with PROFILER.Span("BuildStore"):
+            while stack:
+                current, parent = stack.pop()
+                i = store.AddNode(current, parent)
+                stack.extend((child, i) for child in reversed(current))
+        PROFILER.Count("BuildStore", len(store))
+        return store
+
+    @staticmethod
+    def ExportLabeledXml(node, output_path, indent="  ", label_format="text"):
+        # Serialize straight from the XmlNode tree in one pre-order pass;
+        # indent=None writes the elements without layout whitespace.
+        # Returns the number of elements written
+        with PROFILER.Span("export"):
+            writer = LabeledXmlWriter(output_path, indent, label_format)
+            count = XmlLabeler.WriteLabeledXml(writer, node)
+            writer.Close()
+        PROFILER.Count("export", count)
+        return count
+
+    @staticmethod
+    def WriteLabeledXml(writer, node):
+        # Write node's subtree through writer; returns the number of elements
+        count = 0
+
+        def enter(current, state, position):
+            nonlocal count
+            count += 1
+            writer.StartElement(current.Element, current.Label)
+            return True
+
+        TreeWalker.Walk(node, enter, lambda current, state: writer.EndElement())
+        return count
+    
+    @staticmethod
+    def CollectNodes(root):
+        nodes = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(reversed(node.Children))
+        return nodes
+
+    # A start tag up to its closing '>', skipping quoted attribute values
+    START_TAG = re.compile(rb"""<[^"'>]*(?:(?:"[^"]*"|'[^']*')[^"'>]*)*>""")
+
+    @staticmethod
+    def ElementOffsets(input_path):
+        # Start and end byte offsets of every element in document order, and
+        # the document's namespace declarations (prefix -> uri, first binding
+        # wins), from a bare expat scan over the mapped file that builds no
+        # elements.  expat reports an end tag at its '<', except for <empty/>
+        # elements, where it is already past the '/>'
+        starts = array.array("q")
+        ends = array.array("q")
+        namespaces = {}
+        open_positions = []
+
+        def start_element(name, attributes):
+            open_positions.append(len(starts))
+            starts.append(parser.CurrentByteIndex)
+            ends.append(-1)
+            for key, value in attributes.items():
+                if key == "xmlns" or key.startswith("xmlns:"):
+                    namespaces.setdefault(key[6:], value)
+
+        def end_element(name):
+            i = open_positions.pop()
+            end = parser.CurrentByteIndex
+            if i == len(starts) - 1:
+                # No child elements, so it may be a single <empty/> tag
+                start_tag = XmlLabeler.START_TAG.match(data, starts[i])
+                if start_tag.end() == end and data[end-2:end] == b"/>":
+                    ends[i] = end
+                    return
+            ends[i] = data.find(b">", end) + 1
+
+        parser = xml.parsers.expat.ParserCreate()
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        with open(input_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            parser.Parse(data, True)
+        return starts, ends, namespaces
+
+    @staticmethod
+    def GetMemoryUsage():
+        process = psutil.Process(os.getpid())
+        return process.memory_info().rss // 1024  # KB
+
+class DocumentStore:
+    # Columnar document: node i's structure and label live at position i of
+    # parallel arrays instead of in an XmlNode with its own __dict__ and
+    # Children list. Ids follow document order, tag names are interned once
+    # in Tags, and -1 stands for "no node". Labels are one object per node
+    # in the Labels column; a scheme with fixed-size labels overrides
+    # AddLabel, GetLabel and SetLabel to keep them in arrays instead.
+    # StoreNode is the XmlNode view the labelers and queries run on.
+    def __init__(self):
+        self.Parent = array.array("l")
+        self.FirstChild = array.array("l")
+        self.LastChild = array.array("l")
+        self.NextSibling = array.array("l")
+        self.TagId = array.array("l")
+        self.Level = array.array("l")
+        self.Labels = []
+        self.Tags = []
+        self.tagIds = {}
+        self.Elements = []
+
+    def __len__(self):
+        return len(self.Parent)
+
+    def AddNode(self, element, parent):
+        # Appends a node as the last child of parent; returns its id
+        i = len(self.Parent)
+        tagId = self.tagIds.get(element.tag)
+        if tagId is None:
+            tagId = self.tagIds[element.tag] = len(self.Tags)
+            self.Tags.append(element.tag)
+        self.Parent.append(parent)
+        self.FirstChild.append(-1)
+        self.LastChild.append(-1)
+        self.NextSibling.append(-1)
+        self.TagId.append(tagId)
+        self.Level.append(self.Level[parent] + 1 if parent >= 0 else 0)
+        self.AddLabel()
+        self.Elements.append(element)
+        if parent >= 0:
+            if self.LastChild[parent] < 0:
+                self.FirstChild[parent] = i
+            else:
+                self.NextSibling[self.LastChild[parent]] = i
+            self.LastChild[parent] = i
+        return i
+
+    def AddLabel(self):
+        # An empty label for the node AddNode appends
+        self.Labels.append(None)
+
+    def GetLabel(self, i):
+        return self.Labels[i]
+
+    def SetLabel(self, i, label):
+        self.Labels[i] = label
+
+    def ChildIds(self, i):
+        child = self.FirstChild[i]
+        while child >= 0:
+            yield child
+            child = self.NextSibling[child]
+
+    def Node(self, i):
+        return StoreNode(self, i)
+
+    def Partition(self, count):
+        # Split the root's subtrees into at most count runs of consecutive
+        # children with about the same number of nodes. A subtree is the id
+        # range from its root up to the next sibling, so each run is an id
+        # range (lo, hi), returned with the position of its first child.
+        n = len(self)
+        children = list(self.ChildIds(0)) if n else []
+        chunks = []
+        target = n / max(count, 1)
+        lo, position = None, 0
+        for j, child in enumerate(children):
+            if lo is None:
+                lo, position = child, j
+            hi = children[j + 1] if j + 1 < len(children) else n
+            if hi - lo >= target or hi == n:
+                chunks.append((lo, hi, position))
+                lo = None
+        return chunks
+
+class StoreNode:
+    # XmlNode-compatible view of one DocumentStore row. Views are created on
+    # demand and compare equal by row, so they can be kept in sets and dicts
+    __slots__ = ("Store", "Id")
+
+    def __init__(self, store, i):
+        self.Store = store
+        self.Id = i
+
+    @property
+    def Name(self):
+        return self.Store.Tags[self.Store.TagId[self.Id]]
+
+    @property
+    def Element(self):
+        return self.Store.Elements[self.Id]
+
+    @property
+    def Children(self):
+        return [StoreNode(self.Store, child) for child in self.Store.ChildIds(self.Id)]
+
+    @property
+    def Parent(self):
+        parent = self.Store.Parent[self.Id]
+        return StoreNode(self.Store, parent) if parent >= 0 else None
+
+    @property
+    def Label(self):
+        return self.Store.GetLabel(self.Id)
+
+    @Label.setter
+    def Label(self, label):
+        self.Store.SetLabel(self.Id, label)
+
+    def __eq__(self, other):
+        return isinstance(other, StoreNode) and self.Store is other.Store and self.Id == other.Id
+
+    def __hash__(self):
+        return self.Id
+
+class TagIndex:
+    # Inverted index from tag name to the document's nodes with that tag,
+    # each list kept in document order. Root is the root of the indexed
+    # tree; a labeler holding the index keeps it current through its
+    # inserts, deletes and moves, not through XmlNode edits made around it
+    def __init__(self):
+        self.Tags = {}
+        self.AllNodes = []
+        self.Root = None
+
+    def Add(self, node):
+        self.Tags.setdefault(node.Name, []).append(node)
+        self.AllNodes.append(node)
+
+    def Get(self, tag):
+        if tag == "*":
+            return self.AllNodes
+        return self.Tags.get(tag, [])
+
+    @classmethod
+    def FromTree(cls, root):
+        index = cls()
+        for node in XmlLabeler.CollectNodes(root):
+            index.Add(node)
+        index.Root = root
+        return index
+
+    @classmethod
+    def FromStore(cls, store):
+        # Store ids are already in document order
+        index = cls()
+        for i in range(len(store)):
+            index.Add(store.Node(i))
+        index.Root = store.Node(0)
+        return index
+
+    @classmethod
+    def Kept(cls, labeler, root):
+        # The labeler's index if it covers root's tree, else a new one that
+        # the labeler keeps current from now on
+        index = labeler.index
+        if index is None or index.Root is not root:
+            index = labeler.index = cls.FromTree(root)
+        return index
+
+    def InsertSubtrees(self, roots, orderKey):
+        # Add labeled subtrees just linked into the tree; orderKey gives the
+        # labels' document order. A large batch goes into each list in one
+        # sort, which only has to merge two ordered runs, instead of one
+        # bisect per node
+        newNodes = [newNode for root in roots for newNode in XmlLabeler.CollectNodes(root)]
+        groups = {}
+        for newNode in newNodes:
+            groups.setdefault(newNode.Name, []).append(newNode)
+        groups = [(self.Tags.setdefault(tag, []), group) for tag, group in groups.items()]
+        for nodes, group in groups + [(self.AllNodes, newNodes)]:
+            if len(group) * 16 < len(nodes):
+                for newNode in group:
+                    nodes.insert(bisect.bisect_left(nodes, orderKey(newNode), key=orderKey), newNode)
+            else:
+                nodes[:] = sorted(nodes + group, key=orderKey)
+
+    def RemoveSubtree(self, node, orderKey):
+        # Drop a subtree before it is detached: in every list its nodes are
+        # one run, starting at the first of them in document order
+        firsts = {}
+        counts = {}
+        subtree = XmlLabeler.CollectNodes(node)
+        for current in subtree:
+            firsts.setdefault(current.Name, current)
+            counts[current.Name] = counts.get(current.Name, 0) + 1
+        runs = [(self.Tags[tag], first, counts[tag]) for tag, first in firsts.items()]
+        for nodes, first, count in runs + [(self.AllNodes, node, len(subtree))]:
+            i = bisect.bisect_left(nodes, orderKey(first), key=orderKey)
+            del nodes[i:i + count]
+
+class PathQuery(ABC):
+    # Path queries with "/" child steps, "//" descendant steps, "*", positional
+    # [n], equality predicates [@attr='v'], [child='v'], [text()='v'] and
+    # existence predicates [@attr], [child].
+    # Each step's candidates come from the tag index and neighbouring steps
+    # are joined by structural joins instead of walking Children. A scheme
+    # subclasses PathQuery with its labels' document order (OrderKey) and
+    # ancestor and parent tests - the joins only ask IsParent(a, b) once a
+    # is known to be an ancestor of b - and may key siblings by something
+    # cheaper than their parent node (ParentKey)
+    TOKEN = re.compile(r"(//|/)|\[([^\]]*)\]|([^/\[\]]+)")
+    PREDICATE = re.compile(r"""\s*(?:(\d+)|(@?[\w.:-]+|text\(\))(?:\s*=\s*(['"])(.*)\3)?)\s*""")
+
+    def __init__(self, index):
+        self.index = index
+
+    @abstractmethod
+    def OrderKey(self, node):
+        ...
+
+    @abstractmethod
+    def IsAncestor(self, a, b):
+        ...
+
+    @abstractmethod
+    def IsParent(self, a, b):
+        ...
+
+    def ParentKey(self, node):
+        return node.Parent
+
+    @staticmethod
+    def Parse(path):
+        # Returns [(axis, tag, predicates)] with axis "child" or "descendant"
+        steps = []
+        axis = "child"
+        end = 0
+        previous = None
+        for match in PathQuery.TOKEN.finditer(path):
+            if match.start() != end:
+                raise ValueError(f"Malformed path: {path}")
+            end = match.end()
+            separator, predicate, tag = match.groups()
+            if separator and not previous:
+                axis = "descendant" if separator == "//" else "child"
+            elif separator:
+                raise ValueError(f"Malformed path: {path}")
+            elif tag and (previous or not steps):
+                steps.append((axis, tag.strip(), []))
+            elif tag:
+                raise ValueError(f"Step without a separator: {path}")
+            elif steps and not previous:
+                steps[-1][2].append(PathQuery.ParsePredicate(predicate))
+            else:
+                raise ValueError(f"Predicate without a step: {path}")
+            previous = separator
+        if end != len(path) or not steps or previous:
+            raise ValueError(f"Malformed path: {path}")
+        return steps
+
+    @staticmethod
+    def ParsePredicate(predicate):
+        match = PathQuery.PREDICATE.fullmatch(predicate)
+        if match is None:
+            raise ValueError(f"Unsupported predicate: [{predicate}]")
+        position, name, _, value = match.groups()
+        if position:
+            return ("position", int(position), None)
+        if name == "text()":
+            if value is None:
+                raise ValueError(f"Unsupported predicate: [{predicate}]")
+            return ("text", None, value)
+        if name.startswith("@"):
+            return ("attribute", name[1:], value)
+        return ("child", name, value)
+
+    def Run(self, root, path):
+        steps = self.Parse(path)
+        candidates = []
+        for i, (axis, tag, predicates) in enumerate(steps):
+            if i == 0 and axis == "child":
+                candidates.append([root] if tag in ("*", root.Name) else [])
+            else:
+                candidates.append(self.index.Get(tag))
+
+        # Plan: start from the step with the fewest candidates and prune the
+        # steps above it before joining downwards from the root
+        pivot = min(range(len(steps)), key=lambda i: len(candidates[i]))
+        candidates[pivot] = self.Filter(candidates[pivot], steps[pivot][2])
+        for i in range(pivot - 1, -1, -1):
+            nodes = self.Filter(candidates[i], steps[i][2])
+            candidates[i] = self.JoinAncestors(nodes, candidates[i + 1], steps[i + 1][0] == "child")
+
+        result = candidates[0]
+        for i in range(1, len(steps)):
+            if not result:
+                break
+            nodes = candidates[i] if i <= pivot else self.Filter(candidates[i], steps[i][2])
+            result = self.JoinDescendants(result, nodes, steps[i][0] == "child")
+        return result
+
+    def Filter(self, nodes, predicates):
+        for kind, name, value in predicates:
+            if kind == "position":
+                # n-th node with this tag under each parent
+                counts = {}
+                kept = []
+                for node in nodes:
+                    key = self.ParentKey(node)
+                    counts[key] = counts.get(key, 0) + 1
+                    if counts[key] == name:
+                        kept.append(node)
+                nodes = kept
+            elif kind == "attribute" and value is None:
+                nodes = [node for node in nodes if name in node.Element.attrib]
+            elif kind == "attribute":
+                nodes = [node for node in nodes if node.Element.get(name) == value]
+            elif kind == "text":
+                nodes = [node for node in nodes if (node.Element.text or "").strip() == value]
+            else:
+                children = self.index.Get(name)
+                if value is not None:
+                    children = [child for child in children
+                                if (child.Element.text or "").strip() == value]
+                nodes = self.JoinAncestors(nodes, children, True)
+        return nodes
+
+    def Scan(self, ancestors, candidates):
+        # Stack-Tree walk behind every join: yields each candidate with the
+        # stack of its ancestors from `ancestors`, outermost first. Both
+        # lists are in document order, so the walk is O(|A| + |D|) plus the
+        # stacks' lengths
+        orderKey, isAncestor = self.OrderKey, self.IsAncestor
+        stack = []
+        i = 0
+        for node in candidates:
+            key = orderKey(node)
+            while i < len(ancestors) and orderKey(ancestors[i]) < key:
+                while stack and not isAncestor(stack[-1], ancestors[i]):
+                    stack.pop()
+                stack.append(ancestors[i])
+                i += 1
+            while stack and not isAncestor(stack[-1], node):
+                stack.pop()
+            yield node, stack
+
+    def JoinDescendants(self, ancestors, candidates, childOnly):
+        # Candidates with an ancestor (or parent) in `ancestors`
+        return [node for node, stack in self.Scan(ancestors, candidates)
+                if stack and (not childOnly or self.IsParent(stack[-1], node))]
+
+    def JoinAncestors(self, ancestors, candidates, childOnly):
+        # Ancestors with at least one descendant (or child) in `candidates`
+        matched = set()
+        for node, stack in self.Scan(ancestors, candidates):
+            if not stack:
+                continue
+            if childOnly:
+                if self.IsParent(stack[-1], node):
+                    matched.add(stack[-1])
+                continue
+            # Everything below a matched entry was matched along with it
+            for ancestor in reversed(stack):
+                if ancestor in matched:
+                    break
+                matched.add(ancestor)
+        return [ancestor for ancestor in ancestors if ancestor in matched]
+
+    def JoinPairs(self, ancestors, candidates, childOnly):
+        # Every (ancestor, descendant) or (parent, child) pair of the two
+        # lists, in candidate order
+        pairs = []
+        for node, stack in self.Scan(ancestors, candidates):
+            if childOnly:
+                if stack and self.IsParent(stack[-1], node):
+                    pairs.append((stack[-1], node))
+            else:
+                pairs.extend((ancestor, node) for ancestor in stack)
+        return pairs
+
+class LabeledXmlWriter:
+    # Writes labeled XML element by element to a buffered file, laid out like
+    # ET.indent(space="  ") output, without building a second Element tree.
+    # The start tag is held back until the element's text is complete, i.e.
+    # until its first child starts or it ends. label_format "hex" or
+    # "base64" writes each label's binary Pack() form instead of its text.
+    LABEL_FORMATS = ("text", "hex", "base64")
+
+    def __init__(self, output_path, indent="  ", label_format="text", open_elements=()):
+        # open_elements writes a part of a document instead, inside these
+        # elements, whose start tags are written elsewhere (see Append) with
+        # the same namespace prefixes
+        if label_format not in LabeledXmlWriter.LABEL_FORMATS:
+            raise ValueError(f"Unknown label format: {label_format}")
+        self.file = open(output_path, "w", encoding="utf-8", buffering=1 << 20)
+        self.indent = indent
+        self.labelFormat = label_format
+        self.stack = []
+        self.pending = None
+        self.prefixes = {}
+        self.declared = [set()]
+        for element in open_elements:
+            declared = set(self.declared[-1])
+            for name in (element.tag, *element.attrib):
+                self.QName(name)
+            declared.update(self.Undeclared(element, declared))
+            self.stack.append(element.tag)
+            self.declared.append(declared)
+        if not self.stack:
+            self.file.write("<?xml version='1.0' encoding='utf-8'?>\n")
+
+    def StartElement(self, element, label):
+        hasText = False
+        if self.pending is not None:
+            hasText = self.WriteStartTag(*self.pending)
+            self.pending = None
+        # As with ET.indent, a first child directly follows non-blank text
+        if self.stack and self.indent is not None and not hasText:
+            self.file.write("\n" + self.indent * len(self.stack))
+        self.pending = (element, label)
+        self.stack.append(element.tag)
+        self.declared.append(set(self.declared[-1]))
+
+    def EndElement(self):
+        tag = self.QName(self.stack.pop())
+        if self.pending is not None:
+            element, label = self.pending
+            self.pending = None
+            text = element.text
+            self.file.write(self.StartTag(element, label))
+            if text and text.strip():
+                self.file.write(">" + self.EscapeText(text) + "</" + tag + ">")
+            else:
+                self.file.write(" />")
+        else:
+            if self.indent is not None:
+                self.file.write("\n" + self.indent * len(self.stack))
+            self.file.write("</" + tag + ">")
+        self.declared.pop()
+
+    def WriteStartTag(self, element, label):
+        self.file.write(self.StartTag(element, label) + ">")
+        if element.text and element.text.strip():
+            self.file.write(self.EscapeText(element.text))
+            return True
+        return False
+
+    def StartTag(self, element, label):
+        declared = self.declared[-1]
+        parts = ["<" + self.QName(element.tag), ' label="' + self.EscapeAttribute(self.FormatLabel(label)) + '"']
+        for key, value in element.attrib.items():
+            parts.append(" " + self.QName(key) + '="' + self.EscapeAttribute(value) + '"')
+        for uri in self.Undeclared(element, declared):
+            parts.append(' xmlns:' + self.prefixes[uri] + '="' + self.EscapeAttribute(uri) + '"')
+            declared.add(uri)
+        return "".join(parts)
+
+    def FormatLabel(self, label):
+        if self.labelFormat == "hex":
+            return label.Pack().hex()
+        if self.labelFormat == "base64":
+            return base64.b64encode(label.Pack()).decode("ascii")
+        return str(label)
+
+    def QName(self, name):
+        # "{uri}local" -> "nsK:local"; the xmlns declaration goes on the
+        # first element in each subtree that needs it
+        if name[:1] != "{":
+            return name
+        uri, local = name[1:].split("}", 1)
+        if uri not in self.prefixes:
+            self.prefixes[uri] = "xml" if uri == "http://www.w3.org/XML/1998/namespace" else f"ns{len(self.prefixes)}"
+        return self.prefixes[uri] + ":" + local
+
+    def Undeclared(self, element, declared):
+        names = [element.tag, *element.attrib]
+        uris = [name[1:].split("}", 1)[0] for name in names if name[:1] == "{"]
+        return [uri for uri in dict.fromkeys(uris) if uri not in declared and self.prefixes[uri] != "xml"]
+
+    def Append(self, part_path):
+        # Copy in a part written with open_elements ending in the current
+        # element, as that element's children
+        if self.pending is not None:
+            self.WriteStartTag(*self.pending)
+            self.pending = None
+        with open(part_path, encoding="utf-8") as part:
+            shutil.copyfileobj(part, self.file, 1 << 20)
+
+    def Close(self):
+        self.file.close()
+
+    @staticmethod
+    def EscapeText(text):
+        if "&" in text:
+            text = text.replace("&", "&amp;")
+        if "<" in text:
+            text = text.replace("<", "&lt;")
+        if ">" in text:
+            text = text.replace(">", "&gt;")
+        return text
+
+    @staticmethod
+    def EscapeAttribute(text):
+        text = LabeledXmlWriter.EscapeText(text)
+        if '"' in text:
+            text = text.replace('"', "&quot;")
+        if "\r" in text:
+            text = text.replace("\r", "&#13;")
+        if "\n" in text:
+            text = text.replace("\n", "&#10;")
+        if "\t" in text:
+            text = text.replace("\t", "&#09;")
+        return text
+
+class ChunkedLabeler(ABC):
+    # Labels a record dump - a root holding a long run of same-tag records -
+    # with byte ranges of it parsed in parallel. Split cuts the root's
+    # content at record start tags. A first pass over the pool counts the
+    # elements and records in every range, and their prefix sums place each
+    # range in the document; a second pass parses, labels and writes every
+    # range to a part file, and the parts are joined under the root. A
+    # scheme subclasses it with its StreamLabeler, which takes the documents
+    # the ranges do not fit, and its RootLabel and LabelRecords hooks
+    CHUNK_SIZE = 8 << 20  # bytes parsed at once by a worker, at most about
+    TAG_NAME = re.compile(rb"<([^\s/>]+)")
+    StreamLabeler = None
+
+    def __init__(self, labeler, workers=None):
+        self.labeler = labeler
+        self.workers = workers or os.cpu_count() or 1
+
+    @abstractmethod
+    def RootLabel(self, total):
+        # The root's label, given the number of elements in the document
+        ...
+
+    @abstractmethod
+    def LabelRecords(self, nodes, rootLabel, before, position):
+        # Label a run of the root's children in place, given the number of
+        # nodes ahead of the run in document order, root included, and the
+        # run's first child position (0-based)
+        ...
+
+    def LabelFile(self, input_path, output_path, indent="  ", label_format="text"):
+        # A document that is not a run of whole records of one tag - records
+        # mixed with other elements, comments holding markup - goes to
+        # StreamLabeler once the counts or a range's parse give it away
+        try:
+            return self.LabelRanges(input_path, output_path, indent, label_format)
+        except (ValueError, ET.ParseError, xml.parsers.expat.ExpatError):
+            return self.StreamLabeler(self.labeler).LabelFile(input_path, output_path, indent, label_format)
+
+    def LabelRanges(self, input_path, output_path, indent, label_format):
+        count = max(self.workers, os.path.getsize(input_path) // ChunkedLabeler.CHUNK_SIZE)
+        prolog, leading, closing, record, ranges = ChunkedLabeler.Split(input_path, count)
+        root = ET.fromstring(prolog + leading + closing)
+        partDirectory = os.path.dirname(os.path.abspath(output_path))
+        with ProcessPoolExecutor(self.workers) as pool, tempfile.TemporaryDirectory(dir=partDirectory) as parts:
+            counts = list(pool.map(ChunkedLabeler.CountRange, itertools.repeat(input_path),
+                                   [start for start, _ in ranges], [end for _, end in ranges],
+                                   itertools.repeat(record)))
+            ranges = ChunkedLabeler.Merge(ranges, counts)
+            starts = [start for start, _, _ in ranges]
+            ends = [end for _, end, _ in ranges]
+            counts = [expected for _, _, expected in ranges]
+            befores, positions = [1], [0]
+            for elements, records in counts:
+                befores.append(befores[-1] + elements)
+                positions.append(positions[-1] + records)
+            total = befores.pop()
+            positions.pop()
+            rootLabel = self.RootLabel(total)
+            partPaths = [os.path.join(parts, f"{k}.xml") for k in range(len(ranges))]
+            list(pool.map(self.LabelRange, itertools.repeat(input_path), starts, ends, itertools.repeat(prolog), itertools.repeat(closing),
+                          itertools.repeat(rootLabel), befores, positions, counts, partPaths,
+                          itertools.repeat(indent), itertools.repeat(label_format)))
+
+            writer = LabeledXmlWriter(output_path, indent, label_format)
+            writer.StartElement(root, rootLabel)
+            for partPath in partPaths:
+                writer.Append(partPath)
+            writer.EndElement()
+            writer.Close()
+        return total
+
+    @staticmethod
+    def Split(input_path, count):
+        # Returns the document up to the end of the root's start tag, the
+        # bytes ahead of the first record, the root's end tag, the record tag
+        # and up to count (start, end) byte ranges of whole records
+        with open(input_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # The first two start tags are the root's and the first record's
+            starts = []
+            parser = xml.parsers.expat.ParserCreate()
+            parser.StartElementHandler = lambda name, attributes: starts.append(parser.CurrentByteIndex)
+            position = 0
+            while len(starts) < 2 and position < len(data):
+                parser.Parse(data[position:position + 65536], False)
+                position += 65536
+            rootTagEnd = XmlLabeler.START_TAG.match(data, starts[0]).end()
+            prolog = data[:rootTagEnd]
+            if len(starts) < 2:
+                closing = b"" if prolog.endswith(b"/>") else b"</" + ChunkedLabeler.TagName(data, starts[0]) + b">"
+                return prolog, b"", closing, b"", []
+            closing = b"</" + ChunkedLabeler.TagName(data, starts[0]) + b">"
+            contentEnd = data.rfind(closing)
+            record = ChunkedLabeler.TagName(data, starts[1])
+            # Raw '<' only opens markup, so the first record start tag after
+            # an even cut is a boundary unless it is nested in a record, which
+            # Merge repairs from the depth counts, or sits in a comment or
+            # CDATA section, which the element counts give away later
+            recordStart = re.compile(b"<" + re.escape(record) + rb"[\s/>]")
+            boundaries = [starts[1]]
+            for k in range(1, count):
+                cut = starts[1] + k * (contentEnd - starts[1]) // count
+                match = recordStart.search(data, max(cut, boundaries[-1] + 1), contentEnd)
+                if match is None:
+                    break
+                boundaries.append(match.start())
+            boundaries.append(contentEnd)
+            return prolog, data[rootTagEnd:starts[1]], closing, record, list(zip(boundaries, boundaries[1:]))
+
+    @staticmethod
+    def TagName(data, start):
+        return ChunkedLabeler.TAG_NAME.match(data, start).group(1)
+
+    @staticmethod
+    def CountRange(input_path, start, end, record):
+        # Elements in a byte range, the change in element depth across it and
+        # its record start tags by their depth relative to the range start,
+        # all by counting markup bytes
+        with open(input_path, "rb") as file:
+            file.seek(start)
+            data = file.read(end - start)
+        records = {}
+        depth = position = 0
+        for match in re.finditer(b"<" + re.escape(record) + rb"[\s/>]", data):
+            depth += ChunkedLabeler.DepthChange(data, position, match.start())
+            records[depth] = records.get(depth, 0) + 1
+            position = match.start()
+        depth += ChunkedLabeler.DepthChange(data, position, len(data))
+        return ChunkedLabeler.StartTags(data, 0, len(data)), depth, records
+
+    @staticmethod
+    def StartTags(data, start, end):
+        return (data.count(b"<", start, end) - data.count(b"</", start, end)
+                - data.count(b"<!", start, end) - data.count(b"<?", start, end))
+
+    @staticmethod
+    def DepthChange(data, start, end):
+        # Start tags less end tags and empty-element tags
+        return (ChunkedLabeler.StartTags(data, start, end) - data.count(b"</", start, end)
+                - data.count(b"/>", start, end))
+
+    @staticmethod
+    def Merge(ranges, counts):
+        # Join every range that starts inside a record, cut at a nested
+        # record start tag, onto the range before it. Returns (start, end,
+        # (elements, records)) per range, where only the root's children
+        # count as records
+        merged = []
+        depth = 0
+        for (start, end), (elements, change, records) in zip(ranges, counts):
+            records = records.get(-depth, 0)
+            if depth:
+                first, _, (before, previous) = merged[-1]
+                merged[-1] = (first, end, (before + elements, previous + records))
+            else:
+                merged.append((start, end, (elements, records)))
+            depth += change
+            if depth < 0:
+                raise ValueError(f"Unbalanced markup between the records ending at byte {end}")
+        if depth:
+            raise ValueError("Unbalanced markup in the records")
+        return merged
+
+    def LabelRange(self, input_path, start, end, prolog, closing, rootLabel, before, position, expected,
+                   part_path, indent, label_format):
+        # Parse one range under a copy of the root, label its records in
+        # place and write them to part_path
+        with open(input_path, "rb") as file:
+            file.seek(start)
+            root = ET.fromstring(prolog + file.read(end - start) + closing)
+        nodes = [XmlLabeler.BuildTree(record) for record in root]
+        self.LabelRecords(nodes, rootLabel, before, position)
+        writer = LabeledXmlWriter(part_path, indent, label_format, open_elements=[root])
+        count = sum(XmlLabeler.WriteLabeledXml(writer, node) for node in nodes)
+        writer.Close()
+        if (count, len(nodes)) != tuple(expected):
+            raise ValueError(f"{input_path}: bytes {start}-{end} are not a run of whole records of one tag, "
+                             f"or comments or CDATA sections in them hold markup")
+        return count
+
+class Varint:
+    # Order-preserving UTF-8-style varints: the run of 1 bits in the lead
+    # byte gives the length, then a big-endian payload, so encoded numbers
+    # compare like the numbers and a run of them can be cut without a
+    # length prefix. Values up to 2**64 - 1
+    @staticmethod
+    def Encode(n):
+        if n < 0:
+            raise ValueError(f"Negative varint: {n}")
+        for size in range(1, 9):
+            if n < 1 << (7 * size):
+                lead = (0xFF << (9 - size)) & 0xFF
+                return ((lead << (8 * (size - 1))) | n).to_bytes(size, "big")
+        if n < 1 << 64:
+            return b"\xff" + n.to_bytes(8, "big")
+        raise ValueError(f"Too large to encode as a varint: {n}")
+
+    @staticmethod
+    def Decode(data):
+        size = len(data)
+        return int.from_bytes(data, "big") & ((1 << (7 * size if size < 9 else 64)) - 1)
+
+    @staticmethod
+    def Size(lead):
+        # One more than the lead byte's leading 1 bits, at most 9
+        return min(9, 9 - (~lead & 0xFF).bit_length())
+
+class LabelIndex:
+    # Sidecar index of a labeled document. It holds one fixed-size record per
+    # node (source start and end byte offsets, packed label, tag id), sorted
+    # by packed label, plus a posting list of record numbers per tag. Opening
+    # it maps the file with mmap, so lookups only touch the pages they need
+    # and no XML is parsed. Source offsets of -1 mark a node inserted after
+    # parsing. The source path is stored relative to the index, together
+    # with the document's namespace declarations and its prolog (the bytes
+    # before the root element: XML declaration, DOCTYPE and internal DTD
+    # subset), so Fetch can parse a single element back out of the source
+    # with the encoding and entities the document declares.
+    MAGIC = b"LIDX"
+    VERSION = 3
+    HEADER = struct.Struct("<4sIQIIQQQQ")  # magic, version, count, tags, namespaces, records, postings, heap, prolog
+    RECORD = struct.Struct("<qqQIi")  # source start, source end, heap position, label length, tag id
+
+    def __init__(self, index_path, source_path=None):
+        self.file = open(index_path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, tagCount, namespaceCount, self.recordsOffset, self.postingsOffset, \
+            self.heapOffset, prologLength = LabelIndex.HEADER.unpack_from(self.data, 0)
+        if magic != LabelIndex.MAGIC or version != LabelIndex.VERSION:
+            raise ValueError(f"Not a version {LabelIndex.VERSION} label index: {index_path}")
+        position = LabelIndex.HEADER.size
+        self.Prolog = self.data[position:position + prologLength]
+        position += prologLength
+        strings = []
+        for _ in range(1 + tagCount + 2 * namespaceCount):
+            (length,) = struct.unpack_from("<H", self.data, position)
+            strings.append(self.data[position + 2:position + 2 + length].decode("utf-8"))
+            position += 2 + length
+        if source_path is None and strings[0]:
+            source_path = os.path.join(os.path.dirname(index_path), strings[0])
+        self.SourcePath = source_path
+        self.Tags = strings[1:1 + tagCount]
+        self.tagIds = {tag: i for i, tag in enumerate(self.Tags)}
+        self.Namespaces = dict(zip(strings[1 + tagCount::2], strings[2 + tagCount::2]))
+        self.source = None
+
+    def __len__(self):
+        return self.count
+
+    def Record(self, i):
+        # (packed label, tag, source start, source end) of the i-th record
+        sourceStart, sourceEnd, position, length, tagId = LabelIndex.RECORD.unpack_from(
+            self.data, self.recordsOffset + i * LabelIndex.RECORD.size)
+        start = self.heapOffset + position
+        return self.data[start:start + length], self.Tags[tagId], sourceStart, sourceEnd
+
+    def Label(self, i):
+        _, _, position, length, _ = LabelIndex.RECORD.unpack_from(
+            self.data, self.recordsOffset + i * LabelIndex.RECORD.size)
+        start = self.heapOffset + position
+        return self.data[start:start + length]
+
+    def Find(self, label):
+        # Record number of a packed label by binary search, or -1
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.Label(middle) < label:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.count and self.Label(low) == label else -1
+
+    def WithTag(self, tag):
+        # Record numbers of every node with this tag, in label order
+        tagId = self.tagIds.get(tag)
+        if tagId is None:
+            return []
+        start, end = struct.unpack_from("<QQ", self.data, self.postingsOffset + 8 * tagId)
+        first = self.postingsOffset + 8 * (len(self.Tags) + 1)
+        return list(struct.unpack_from(f"<{end - start}I", self.data, first + 4 * start))
+
+    def Fetch(self, label):
+        # Element with this label (packed or not), parsed from its byte range
+        # of the source alone, or None if the label is unknown or the node was
+        # not in the source
+        if not isinstance(label, (bytes, bytearray)):
+            label = label.Pack()
+        i = self.Find(label)
+        if i < 0:
+            return None
+        _, _, start, end = self.Record(i)
+        if start < 0:
+            return None
+        if self.source is None:
+            self.source = open(self.SourcePath, "rb")
+        self.source.seek(start)
+        fragment = self.source.read(end - start)
+        if not self.Namespaces:
+            return ET.fromstring(self.Prolog + fragment)
+        # Prefixes may be declared on an ancestor, outside the fragment
+        declarations = "".join(f' xmlns{":" + prefix if prefix else ""}="{LabeledXmlWriter.EscapeAttribute(uri)}"'
+                               for prefix, uri in self.Namespaces.items())
+        return ET.fromstring(self.Prolog + b"<fragment" + declarations.encode("utf-8") + b">" + fragment
+                             + b"</fragment>")[0]
+
+    def Close(self):
+        if self.source is not None:
+            self.source.close()
+        self.data.close()
+        self.file.close()
+
+    @staticmethod
+    def Write(index_path, root, offsets=None, source_path=None, namespaces=None):
+        # offsets maps source Elements to their (start, end) byte offsets in
+        # source_path; returns the number of records written
+        entries = []
+        for node in XmlLabeler.CollectNodes(root):
+            start, end = offsets.get(node.Element, (-1, -1)) if offsets is not None else (-1, -1)
+            entries.append((node.Label.Pack(), node.Name, start, end))
+        return LabelIndex.WriteEntries(index_path, entries, source_path, namespaces)
+
+    @staticmethod
+    def WriteEntries(index_path, entries, source_path=None, namespaces=None):
+        # Write from (packed label, tag, source start, source end) entries in
+        # document order, for labels that live in no tree, such as a stream
+        # labeler's
+        entries = list(entries)
+        prolog = b""
+        if source_path and entries[0][2] > 0:
+            with open(source_path, "rb") as file:
+                prolog = file.read(entries[0][2])
+        entries.sort(key=lambda entry: entry[0])
+
+        tagIds = {}
+        postings = []
+        for i, (_, tag, _, _) in enumerate(entries):
+            if tag not in tagIds:
+                tagIds[tag] = len(tagIds)
+                postings.append([])
+            postings[tagIds[tag]].append(i)
+        namespaces = namespaces or {}
+        source = os.path.relpath(source_path, os.path.dirname(index_path) or ".") if source_path else ""
+        strings = [source, *tagIds] + [string for pair in namespaces.items() for string in pair]
+        stringBytes = b"".join(struct.pack("<H", len(string)) + string
+                               for string in (string.encode("utf-8") for string in strings))
+
+        recordsOffset = LabelIndex.HEADER.size + len(prolog) + len(stringBytes)
+        postingsOffset = recordsOffset + LabelIndex.RECORD.size * len(entries)
+        heapOffset = postingsOffset + 8 * (len(tagIds) + 1) + 4 * len(entries)
+        starts = [0]
+        for posting in postings:
+            starts.append(starts[-1] + len(posting))
+
+        with open(index_path, "wb") as file:
+            file.write(LabelIndex.HEADER.pack(LabelIndex.MAGIC, LabelIndex.VERSION, len(entries), len(tagIds),
+                                              len(namespaces), recordsOffset, postingsOffset, heapOffset,
+                                              len(prolog)))
+            file.write(prolog)
+            file.write(stringBytes)
+            position = 0
+            for label, tag, start, end in entries:
+                file.write(LabelIndex.RECORD.pack(start, end, position, len(label), tagIds[tag]))
+                position += len(label)
+            file.write(struct.pack(f"<{len(starts)}Q", *starts))
+            for posting in postings:
+                file.write(struct.pack(f"<{len(posting)}I", *posting))
+            for label, _, _, _ in entries:
+                file.write(label)
+        return len(entries)
+
+class MemoryTracker:
+    # tracemalloc accounting per phase, in place of RSS deltas, which mostly
+    # read 0 since the allocator rarely hands memory back. Between
+    # Start(name) and Stop() it records the phase's net allocation (blocks
+    # allocated in it and still held at its end) and its peak above the
+    # start, in bytes. Phases nest, and tracing only runs while one is
+    # open: it slows Python code down 2-4x, so timings taken inside a phase
+    # are inflated, and a disabled tracker does nothing at all. Tracing the
+    # caller already had running is left on
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.Phases = {}
+        self.open = []
+        self.started = False
+
+    def Start(self, name):
+        if not self.enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started = True
+        current, peak = tracemalloc.get_traced_memory()
+        if self.open:
+            # reset_peak would lose the enclosing phase's peak so far
+            self.open[-1][2] = max(self.open[-1][2], peak)
+        tracemalloc.reset_peak()
+        self.open.append([name, current, current])
+
+    def Stop(self):
+        # The phase's (net, peak) in bytes; (0, 0) when disabled
+        if not self.enabled:
+            return 0, 0
+        name, start, peak = self.open.pop()
+        current, phasePeak = tracemalloc.get_traced_memory()
+        peak = max(peak, phasePeak)
+        if self.open:
+            self.open[-1][2] = max(self.open[-1][2], peak)
+        elif self.started:
+            tracemalloc.stop()
+            self.started = False
+        self.Phases[name] = (current - start, peak - start)
+        return self.Phases[name]
+
+    @contextmanager
+    def Phase(self, name):
+        self.Start(name)
+        try:
+            yield
+        finally:
+            self.Stop()
+
+    def Report(self, count, labels=()):
+        # One line per phase with its net bytes per node for count nodes, and
+        # the deep size per label of labels
+        if not self.enabled:
+            return
+        for name, (net, peak) in self.Phases.items():
+            print(f"Memory {name}: net {net / 1024:.1f} KB ({net / count:.1f} B per node), "
+                  f"peak {peak / 1024:.1f} KB")
+        labels = list(labels)
+        if labels:
+            print(f"Label structures: {MemoryTracker.DeepSize(labels) / len(labels):.1f} B per label")
+
+    @staticmethod
+    def DeepSize(objects):
+        # Bytes of everything reachable from objects, each counted once, so
+        # a prefix shared by many Dewey labels counts once; classes, modules
+        # and functions are not followed
+        seen = set()
+        size = 0
+        stack = list(objects)
+        while stack:
+            current = stack.pop()
+            if id(current) in seen or isinstance(current, (type, types.ModuleType, types.FunctionType)):
+                continue
+            seen.add(id(current))
+            size += sys.getsizeof(current)
+            stack.extend(gc.get_referents(current))
+        return size
+
+class Profiler:
+    # Opt-in spans over the library's own phases: parsing, BuildTree and
+    # BuildStore, the labelers' whole-tree labeling and insertions,
+    # QueryNodes, ExportLabeledXml and streaming each run in a span of the
+    # module-level PROFILER. Per phase name it adds up the calls, wall time,
+    # nodes processed, labels (new ones, or for insertions every label
+    # written or changed) and net memory blocks: the change in
+    # sys.getallocatedblocks, blocks freed in the phase offset against
+    # those allocated, which costs nothing while the phase runs, unlike
+    # tracemalloc. Spans nest, so an insertion's labeling counts in
+    # both phases. Disabled, Span is a nullcontext and the counters return
+    # at once; with a pstats path, cProfile also runs while any span is open
+    # and Report dumps its statistics there
+    LABEL_COLUMNS = {"insert": "labels touched"}
+
+    def __init__(self, enabled=False, pstats_path=None):
+        self.enabled = False
+        self.Phases = {}  # name -> [calls, ns, nodes, labels, blocks]
+        self.open = 0
+        self.overhead = 0
+        self.profile = None
+        self.pstatsPath = None
+        if enabled:
+            self.Enable(pstats_path)
+
+    def Enable(self, pstats_path=None):
+        self.enabled = True
+        if pstats_path is not None:
+            self.profile = cProfile.Profile()
+            self.pstatsPath = pstats_path
+
+    def Span(self, name):
+        return self.span(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def span(self, name):
+        if self.open == 0 and self.profile is not None:
+            self.profile.enable()
+        self.open += 1
+        overhead = self.overhead
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            # Counting walks done inside the span are not its own time
+            elapsed = time.perf_counter_ns() - start - (self.overhead - overhead)
+            phase = self.Phases.setdefault(name, [0, 0, 0, 0, 0])
+            phase[0] += 1
+            phase[1] += elapsed
+            phase[4] += sys.getallocatedblocks() - blocks
+            self.open -= 1
+            if self.open == 0 and self.profile is not None:
+                self.profile.disable()
+
+    def Count(self, name, nodes=0, labels=0):
+        if self.enabled:
+            phase = self.Phases.setdefault(name, [0, 0, 0, 0, 0])
+            phase[2] += nodes
+            phase[3] += labels
+
+    def CountWalk(self, name, count, labels=False):
+        # Count(name) with count() nodes, and as many labels if labels, for
+        # counts that take a walk over the tree; the walk is left out of the
+        # time of every span still open
+        if not self.enabled:
+            return
+        start = time.perf_counter_ns()
+        nodes = count()
+        self.Count(name, nodes, nodes if labels else 0)
+        self.overhead += time.perf_counter_ns() - start
+
+    def Report(self, top=15):
+        # One line per phase, then the top cProfile entries by cumulative time
+        if not self.enabled:
+            return
+        for name, (calls, elapsed, nodes, labels, blocks) in self.Phases.items():
+            rate = f" ({nodes / elapsed * 1e9:.0f} nodes/s)" if nodes and elapsed else ""
+            print(f"Profile {name}: {calls} calls, {elapsed / 1e6:.2f} ms, {nodes} nodes{rate}, "
+                  f"{labels} {Profiler.LABEL_COLUMNS.get(name, 'labels')}, {blocks} net blocks")
+        if self.profile is not None:
+            self.profile.dump_stats(self.pstatsPath)
+            pstats.Stats(self.profile).sort_stats("cumulative").print_stats(top)
+            print(f"Profile statistics saved to {self.pstatsPath}")
+
+PROFILER = Profiler()
@@ -0,0 +1,839 @@
+import xml.etree.ElementTree as ET
+import os
+import math
+import itertools
+import array
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from decimal import Decimal
+from . import core
+from .core import TreeWalker, LabeledXmlWriter, TagIndex, Varint, PROFILER
+
+class PathQuery(core.PathQuery):
+    # core.PathQuery joined through the labeler's tests: prefix test for
+    # Dewey labels, divisibility for prime labels
+    def __init__(self, index, labeler):
+        super().__init__(index)
+        self.labeler = labeler
+
+    def OrderKey(self, node):
+        return self.labeler.OrderKey(node)
+
+    def IsAncestor(self, a, b):
+        return self.labeler.IsAncestor(a, b)
+
+    def IsParent(self, a, b):
+        return self.labeler.IsParent(a, b)
+
+    def ParentKey(self, node):
+        return self.labeler.ParentKey(node)
+
+class XmlLabeler(core.XmlLabeler):
+    # core.XmlLabeler with the path query entry point of the Dewey and prime
+    # number schemes
+    @staticmethod
+    def QueryNodes(root, path, labeler, index=None):
+        # Without an index, the one the labeler keeps for root's tree (built
+        # on first use); counts the nodes it returns
+        with PROFILER.Span("query"):
+            if index is None:
+                index = TagIndex.Kept(labeler, root)
+            result = PathQuery(index, labeler).Run(root, path)
+        PROFILER.Count("query", len(result))
+        return result
+
+class FractionalOrdinal(Fraction):
+    # Careted sibling ordinal; prints as "7/2" inside a label list
+    def __repr__(self):
+        return str(self)
+
+class DeweyCodec:
+    # Binary Dewey labels that are compared, tested and cut as plain bytes.
+    # A component is an order-preserving varint (see core.Varint). An integer ordinal i is stored as 2i. A fractional ordinal between i
+    # and i + 1 (always dyadic, as Between halves intervals) is 2i + 1
+    # followed by its binary digits as bytes 1/2 and a 0 terminator.
+    # Components are prefix-free, so byte order is document order and an
+    # ancestor's bytes are a prefix of its descendants'.
+    @staticmethod
+    def Encode(components):
+        return b"".join(DeweyCodec.EncodeComponent(component) for component in components)
+
+    @staticmethod
+    def Decode(data):
+        components = []
+        i = 0
+        while i < len(data):
+            end = DeweyCodec.ComponentEnd(data, i)
+            components.append(DeweyCodec.DecodeComponent(data[i:end]))
+            i = end
+        return tuple(components)
+
+    @staticmethod
+    def EncodeComponent(ordinal):
+        if ordinal < 0:
+            raise ValueError(f"Negative ordinal: {ordinal}")
+        if isinstance(ordinal, int):
+            return Varint.Encode(2 * ordinal)
+        whole = math.floor(ordinal)
+        fraction = Fraction(ordinal) - whole
+        if not fraction:
+            return Varint.Encode(2 * whole)
+        if fraction.denominator & (fraction.denominator - 1):
+            raise ValueError(f"Only dyadic fractional ordinals can be encoded: {ordinal}")
+        digits = bytearray()
+        while fraction:
+            fraction *= 2
+            if fraction >= 1:
+                digits.append(2)
+                fraction -= 1
+            else:
+                digits.append(1)
+        return Varint.Encode(2 * whole + 1) + bytes(digits) + b"\x00"
+
+    @staticmethod
+    def DecodeComponent(data):
+        size = Varint.Size(data[0])
+        value = Varint.Decode(data[:size])
+        if not value & 1:
+            return value >> 1
+        fraction = Fraction(0)
+        for k, digit in enumerate(data[size:-1], 1):
+            if digit == 2:
+                fraction += Fraction(1, 1 << k)
+        return FractionalOrdinal((value >> 1) + fraction)
+
+    @staticmethod
+    def ComponentEnd(data, i):
+        end = i + Varint.Size(data[i])
+        if end > len(data):
+            raise ValueError("Truncated Dewey label")
+        if data[end - 1] & 1:
+            # Fractional ordinal: binary digits up to the 0 terminator
+            end = data.index(0, end) + 1
+        return end
+
+    @staticmethod
+    def Parent(data):
+        # Label bytes without the last component; the root has no parent
+        if not data:
+            return None
+        i = last = 0
+        while i < len(data):
+            last, i = i, DeweyCodec.ComponentEnd(data, i)
+        return data[:last]
+
+    @staticmethod
+    def Compare(a, b):
+        return (a > b) - (a < b)
+
+    @staticmethod
+    def IsAncestor(a, b):
+        return len(a) < len(b) and b.startswith(a)
+
+    @staticmethod
+    def IsParent(a, b):
+        return DeweyCodec.IsAncestor(a, b) and DeweyCodec.ComponentEnd(b, len(a)) == len(b)
+
+    @staticmethod
+    def IsSibling(a, b):
+        return len(a) > 0 and len(b) > 0 and a != b and DeweyCodec.Parent(a) == DeweyCodec.Parent(b)
+
+    @staticmethod
+    def Lca(a, b):
+        # Longest common run of whole components
+        i = 0
+        while i < len(a) and i < len(b):
+            end = DeweyCodec.ComponentEnd(a, i)
+            if a[i:end] != b[i:end]:
+                break
+            i = end
+        return a[:i]
+
+class DeweyLabel:
+    # Dewey label stored as the parent's label plus one component, so a child
+    # shares its ancestors' components instead of copying them and labeling
+    # allocates one small object per node. The flat component tuple is only
+    # built on demand by Components().
+    __slots__ = ("Parent", "Component", "Length")
+
+    def __init__(self, parent=None, component=None):
+        self.Parent = parent
+        self.Component = component
+        self.Length = parent.Length + 1 if parent is not None else 0
+
+    def __len__(self):
+        return self.Length
+
+    def Components(self):
+        components = [None] * self.Length
+        label = self
+        for i in range(self.Length - 1, -1, -1):
+            components[i] = label.Component
+            label = label.Parent
+        return tuple(components)
+
+    def Ancestor(self, length):
+        # The prefix of the given length, by following parent pointers
+        label = self
+        while label.Length > length:
+            label = label.Parent
+        return label
+
+    def IsPrefixOf(self, other):
+        if self.Length > other.Length:
+            return False
+        # Compare upwards until both sides reach a shared label object
+        label, prefix = self, other.Ancestor(self.Length)
+        while label is not prefix:
+            if label.Component != prefix.Component:
+                return False
+            label, prefix = label.Parent, prefix.Parent
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, DeweyLabel) and self.Length == other.Length and self.IsPrefixOf(other)
+
+    def __hash__(self):
+        return hash(self.Components())
+
+    def __str__(self):
+        return str(list(self.Components()))
+
+    def Pack(self):
+        return DeweyCodec.Encode(self.Components())
+
+    @staticmethod
+    def Unpack(data):
+        label = DeweyLabel()
+        for component in DeweyCodec.Decode(data):
+            label = DeweyLabel(label, component)
+        return label
+
+class PrimeLabeler:
+    def __init__(self, gap=1, index=None):
+        # Spacing between sibling ordinals; wider gaps keep integer ordinals
+        # available for later insertions before falling back to fractions
+        self.gap = gap
+        # Optional TagIndex kept in step with every insert, delete and move
+        self.index = index
+
+    def label_tree(self, element, pLabel):
+    # element.set("label", str(pLabel)) 
+        def enter(node, parentLabel, j):
+            if j == 0:
+                node.Label = pLabel
+            else:
+                node.Label = DeweyLabel(parentLabel, j * self.gap)
+            return node.Label
+
+        with PROFILER.Span("label"):
+            TreeWalker.Walk(element, enter)
+        PROFILER.CountWalk("label", lambda: len(XmlLabeler.CollectNodes(element)), labels=True)
+
+    def LabelStoreParallel(self, store, pLabel, workers=None):
+        # label_tree for a whole DocumentStore with the root's subtrees spread
+        # over a process pool. Each worker numbers the children inside its
+        # chunk, the top level continuing from the chunk's position under the
+        # root; the labels share their prefixes, so they are linked up here,
+        # in one pass over the ids with every parent ahead of its children
+        labels = store.Labels
+        parents = store.Parent
+        labels[0] = pLabel
+        chunks = store.Partition(workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(workers) as pool:
+            results = pool.map(PrimeLabeler.LabelChunk, [store.FirstChild[lo:hi] for lo, hi, _ in chunks],
+                               [store.NextSibling[lo:hi] for lo, hi, _ in chunks],
+                               [lo for lo, _, _ in chunks], [position for _, _, position in chunks],
+                               [self.gap] * len(chunks))
+            for (lo, hi, _), components in zip(chunks, results):
+                for i in range(lo, hi):
+                    labels[i] = DeweyLabel(labels[parents[i]], components[i - lo])
+
+    @staticmethod
+    def LabelChunk(firstChild, nextSibling, lo, position, gap):
+        # Last Dewey component of the ids lo .. lo + len(firstChild) - 1: the
+        # chunk's run of the root's children comes first, then every node's
+        # children in turn
+        hi = lo + len(firstChild)
+        components = array.array("q", bytes(8 * len(firstChild)))
+        child, j = lo, position
+        while 0 <= child < hi:
+            j += 1
+            components[child - lo] = j * gap
+            child = nextSibling[child - lo]
+        for i in range(len(firstChild)):
+            child, j = firstChild[i], 0
+            while child >= 0:
+                j += 1
+                components[child - lo] = j * gap
+                child = nextSibling[child - lo]
+        return components
+        
+    def InsertNode(self, parent, newNode):
+        parent.AddChild(newNode)
+    
+    def InsertLabeledNode(self, parent, newNode):
+        return self.InsertAt(parent, len(parent.Children), newNode)
+
+    def InsertBefore(self, parent, sibling, newNode):
+        return self.InsertAt(parent, parent.Children.index(sibling), newNode)
+
+    def InsertAfter(self, parent, sibling, newNode):
+        return self.InsertAt(parent, parent.Children.index(sibling) + 1, newNode)
+
+    def InsertAt(self, parent, index, newNode):
+        # Pick an ordinal strictly between the neighbouring siblings so that no
+        # existing label changes; returns the number of labels written
+        with PROFILER.Span("insert"):
+            siblings = parent.Children
+            low = siblings[index-1].Label.Component if index > 0 else 0
+            high = siblings[index].Label.Component if index < len(siblings) else None
+            parent.InsertChild(index, newNode)
+
+            self.label_tree(newNode, DeweyLabel(parent.Label, self.Between(low, high)))
+            if self.index is not None:
+                self.index.InsertSubtrees([newNode], self.OrderKey)
+            count = len(XmlLabeler.CollectNodes(newNode))
+            PROFILER.Count("insert", count, count)
+            return count
+
+    def InsertMany(self, parent, nodes, positions=None):
+        # Insert several subtrees under parent in one pass. positions index
+        # parent's current children (default: append after them), and nodes
+        # given the same position keep their order. Each run between two old
+        # siblings is spread over the ordinals between theirs, so no existing
+        # label changes; returns the number of labels written
+        with PROFILER.Span("insert"):
+            siblings = parent.Children
+            if positions is None:
+                positions = [len(siblings)] * len(nodes)
+            runs = {}
+            for position, node in sorted(zip(positions, nodes), key=lambda pair: pair[0]):
+                runs.setdefault(position, []).append(node)
+            touched = 0
+            # Highest position first, so the lower ones still index old children
+            for position in sorted(runs, reverse=True):
+                run = runs[position]
+                low = siblings[position-1].Label.Component if position > 0 else 0
+                high = siblings[position].Label.Component if position < len(siblings) else None
+                for node, ordinal in zip(run, self.Spread(low, high, len(run))):
+                    self.label_tree(node, DeweyLabel(parent.Label, ordinal))
+                    touched += len(XmlLabeler.CollectNodes(node))
+                parent.InsertChildren(position, run)
+            if self.index is not None:
+                self.index.InsertSubtrees(nodes, self.OrderKey)
+            PROFILER.Count("insert", touched, touched)
+            return touched
+
+    def DeleteSubtree(self, parent, node):
+        # Detach node's subtree from parent. Sibling ordinals need not be
+        # consecutive, so no surviving label changes, and the freed ordinal
+        # is back in the range Between picks from; returns 0 labels changed
+        if self.index is not None:
+            self.index.RemoveSubtree(node, self.OrderKey)
+        parent.RemoveChild(node)
+        return 0
+
+    def MoveSubtree(self, parent, node, newParent, index=None):
+        # Detach node's subtree and insert it under newParent at index among
+        # the children left there (default: last). Every label in the subtree
+        # gets the new prefix; returns the number of labels written
+        if node is newParent or self.IsAncestor(node, newParent):
+            raise ValueError("Cannot move a subtree into itself")
+        self.DeleteSubtree(parent, node)
+        if index is None:
+            index = len(newParent.Children)
+        return self.InsertAt(newParent, index, node)
+
+    def Between(self, low, high):
+        if high is None:
+            return math.floor(low) + self.gap
+        if isinstance(low, int) and isinstance(high, int) and high - low > 1:
+            return (low + high) // 2
+        return FractionalOrdinal((Fraction(low) + Fraction(high)) / 2)
+
+    def Spread(self, low, high, count):
+        # count ordinals strictly between low and high (None: no upper end):
+        # evenly spaced integers while they fit, otherwise Between's dyadic
+        # fractions, halving from the middle out so that their length grows
+        # with log2(count) rather than count
+        if high is None:
+            return [math.floor(low) + i * self.gap for i in range(1, count + 1)]
+        if isinstance(low, int) and isinstance(high, int) and high - low > count:
+            step = (high - low) // (count + 1)
+            return [low + i * step for i in range(1, count + 1)]
+        if count == 0:
+            return []
+        middle = self.Between(low, high)
+        left = (count - 1) // 2
+        return self.Spread(low, middle, left) + [middle] + self.Spread(middle, high, count - 1 - left)
+
+    def IsAncestor(self, a, b):
+        # Dewey ancestor test: a's label is a proper prefix of b's label
+        return len(a.Label) < len(b.Label) and a.Label.IsPrefixOf(b.Label)
+
+    def IsParent(self, a, b):
+        return len(b.Label) == len(a.Label) + 1 and a.Label.IsPrefixOf(b.Label)
+
+    def RootLabel(self):
+        return DeweyLabel()
+
+    def ChildLabel(self, pLabel, j):
+        # Label of the j-th child, as label_tree would assign it
+        return DeweyLabel(pLabel, j * self.gap)
+
+    def LabelSubtrees(self, nodes, pLabel, before, position):
+        # Label a run of pLabel's children, from child position + 1 on, as
+        # label_tree would; before, the number of nodes ahead of the run in
+        # document order, does not enter Dewey labels
+        for j, node in enumerate(nodes, position + 1):
+            self.label_tree(node, DeweyLabel(pLabel, j * self.gap))
+
+    def OrderKey(self, node):
+        # Dewey labels sort in document order component by component
+        return node.Label.Components()
+
+    def ParentKey(self, node):
+        # Siblings share their parent's label object
+        return id(node.Label.Parent)
+
+class PrimeLabel:
+    # Products past about 4300 digits (a few thousand levels deep, fewer in
+    # large documents, whose primes are bigger) exceed int.__str__'s
+    # conversion limit, so longer ones print through Decimal, which has none
+    STR_BITS = 13000
+
+    def __init__(self, selfPrime, value, group=None):
+        self.SelfPrime = selfPrime
+        self.Value = value
+        self.Group = group
+
+    def __str__(self):
+        if self.Value.bit_length() <= PrimeLabel.STR_BITS:
+            return str(self.Value)
+        return str(Decimal(self.Value))
+
+    def Pack(self):
+        # Big-endian product; prime labels carry no document order
+        return self.Value.to_bytes(max(1, (self.Value.bit_length() + 7) // 8), "big")
+
+class PrimeTable:
+    def __init__(self, count=1024):
+        self.primes = []
+        self.Extend(count)
+
+    def Extend(self, count):
+        # Upper bound for the count-th prime: n (ln n + ln ln n) for n >= 6
+        n = max(count, 6)
+        limit = int(n * (math.log(n) + math.log(math.log(n)))) + 1
+        sieve = bytearray([1]) * (limit + 1)
+        sieve[0] = sieve[1] = 0
+        for i in range(2, math.isqrt(limit) + 1):
+            if sieve[i]:
+                sieve[i*i::i] = bytes(len(range(i*i, limit + 1, i)))
+        self.primes = list(itertools.compress(range(limit + 1), sieve))
+
+    def Get(self, index):
+        if index >= len(self.primes):
+            self.Extend(2 * (index + 1))
+        return self.primes[index]
+
+class PrimeNumberLabeler:
+    def __init__(self, groupSize=5, offset=168, index=None):
+        self.primeTable = PrimeTable()
+        # Self-primes start at the offset-th prime (1009 by default) and are
+        # handed out in document order, and every node's document order
+        # starts halfway up its self-prime. That leaves free orders between
+        # neighbours for insertions, and room below every self-prime for
+        # following nodes to move up when the free orders run out
+        self.offset = offset
+        self.nextPrime = offset
+        self.root = None
+        # Simultaneous congruence (SC) store: every group of self-primes shares
+        # one CRT value with SC mod self_prime == document order of that node
+        self.groupSize = groupSize
+        self.groups = []
+        self.scValues = []
+        # Optional TagIndex kept in step with every insert, delete and move
+        self.index = index
+
+    def label_tree(self, element, pLabel=None):
+        # Labels the whole document under element; prime labels take no
+        # root label, so pLabel is unused. The root carries the empty
+        # product so that it divides every label
+        self.nextPrime = self.offset
+        self.root = element
+        self.groups, self.scValues = [], []
+        element.Label = PrimeLabel(1, 1)
+
+        def enter(node, parentValue, position):
+            if position > 0:
+                node.Label = self.NewLabel(parentValue)
+                self.AddOrder(node.Label, self.Order(node.Label.SelfPrime))
+            return node.Label.Value
+
+        with PROFILER.Span("label"):
+            TreeWalker.Walk(element, enter)
+        count = self.nextPrime - self.offset + 1
+        PROFILER.Count("label", count, count)
+
+    def LabelStoreParallel(self, store, pLabel=None, workers=None):
+        # label_tree for a whole DocumentStore with the root's subtrees spread
+        # over a process pool. Store ids are document orders, so node i gets
+        # the (offset + i - 1)-th prime wherever it is labeled, and the
+        # workers do the products and SC folds. A group cut in two by a chunk
+        # boundary comes back as two partial SC values, joined here with one
+        # more CRT step
+        n = len(store)
+        groupSize = self.groupSize
+        offset = self.offset
+        self.nextPrime = offset + max(n - 1, 0)
+        self.root = store.Node(0)
+        self.groups, self.scValues = [], []
+        self.primeTable.Get(offset + n)
+        primes = self.primeTable.primes
+        store.Labels[0] = PrimeLabel(1, 1)
+        chunks = store.Partition(workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(workers) as pool:
+            results = pool.map(PrimeNumberLabeler.LabelChunk, [store.Parent[lo:hi] for lo, hi, _ in chunks],
+                               [lo for lo, _, _ in chunks], [groupSize] * len(chunks), [offset] * len(chunks))
+            for (lo, hi, _), (values, scValues) in zip(chunks, results):
+                for i, value in enumerate(values, lo):
+                    store.Labels[i] = PrimeLabel(primes[offset + i - 1], value, (i - 1) // groupSize)
+                for g, sc in enumerate(scValues, (lo - 1) // groupSize):
+                    first, last = max(lo, g * groupSize + 1), min(hi, (g + 1) * groupSize + 1)
+                    members = primes[offset + first - 1:offset + last - 1]
+                    if g < len(self.groups):
+                        modulus = math.prod(self.groups[g])
+                        part = math.prod(members)
+                        previous = self.scValues[g]
+                        self.scValues[g] = previous + modulus * ((sc - previous) * pow(modulus, -1, part) % part)
+                        self.groups[g].extend(members)
+                    else:
+                        self.groups.append(members)
+                        self.scValues.append(sc)
+
+    @staticmethod
+    def LabelChunk(parents, lo, groupSize, offset):
+        # Values of the ids lo .. lo + len(parents) - 1, and the SC values of
+        # the groups they fall in, folded over the chunk's own members only
+        primeTable = PrimeTable(offset + lo + len(parents))
+        firstGroup = (lo - 1) // groupSize
+        values, scValues, moduli = [], [], []
+        for i in range(lo, lo + len(parents)):
+            parent = parents[i - lo]
+            selfPrime = primeTable.Get(offset + i - 1)
+            values.append((values[parent - lo] if parent >= lo else 1) * selfPrime)
+            g = (i - 1) // groupSize - firstGroup
+            if g == len(scValues):
+                scValues.append(0)
+                moduli.append(1)
+            sc, modulus = scValues[g], moduli[g]
+            order = PrimeNumberLabeler.Order(selfPrime)
+            scValues[g] = sc + modulus * ((order - sc) * pow(modulus, -1, selfPrime) % selfPrime)
+            moduli[g] = modulus * selfPrime
+        return values, scValues
+
+    def NewLabel(self, parentValue):
+        # Label with the next unused self-prime, under the parent's value
+        selfPrime = self.primeTable.Get(self.nextPrime)
+        self.nextPrime += 1
+        return PrimeLabel(selfPrime, parentValue * selfPrime)
+
+    @staticmethod
+    def Order(selfPrime):
+        # Document order label_tree gives the node with this self-prime
+        return (selfPrime + 1) // 2
+
+    def AddOrder(self, label, order):
+        if not self.groups or len(self.groups[-1]) >= self.groupSize:
+            self.groups.append([])
+            self.scValues.append(0)
+        g = len(self.groups) - 1
+        # Fold x = order (mod selfPrime) into the group's existing CRT solution
+        modulus = math.prod(self.groups[g])
+        sc = self.scValues[g]
+        sc += modulus * ((order - sc) * pow(modulus, -1, label.SelfPrime) % label.SelfPrime)
+        self.groups[g].append(label.SelfPrime)
+        self.scValues[g] = sc
+        label.Group = g
+
+    @staticmethod
+    def Crt(primes, orders):
+        modulus = math.prod(primes)
+        sc = 0
+        for p, order in zip(primes, orders):
+            m = modulus // p
+            sc += order * m * pow(m, -1, p)
+        return sc % modulus
+
+    def DocumentOrder(self, node):
+        if node.Label.Group is None:
+            return 0
+        return self.scValues[node.Label.Group] % node.Label.SelfPrime
+
+    def OrderOf(self, node, moved):
+        # DocumentOrder, or the order node is moving up to in this batch
+        order = moved.get(node.Label)
+        return self.DocumentOrder(node) if order is None else order
+
+    def Place(self, parent, position, newNodes, moved):
+        # Orders for newNodes, in document order, going in at position among
+        # parent's children: spread evenly over the free orders between the
+        # last node ahead of them and the next node after them. While too few
+        # are free, the following nodes join the run one at a time, so only
+        # as many move up as it takes to find room, and a run that moves
+        # nodes is spread at least 2 apart, which leaves free orders behind
+        # for the next insertion there. Every order stays below its node's
+        # self-prime; bound is the widest spacing that allows. The moved
+        # nodes' new orders go into moved. At the end of the document every
+        # node takes at least the order label_tree would give it. Returns
+        # None when no placement fits below the self-primes
+        last = parent.Children[position-1] if position > 0 else parent
+        while last is not parent and last.Children:
+            last = last.Children[-1]
+        low = self.OrderOf(last, moved)
+        run = list(newNodes)
+        bound = min((node.Label.SelfPrime - 1 - low) // j for j, node in enumerate(run, 1))
+        least = 1
+        for following in self.Following(parent, position):
+            step = min((self.OrderOf(following, moved) - low) // (len(run) + 1), bound)
+            if step >= least:
+                orders = [low + i * step for i in range(1, len(run) + 1)]
+                break
+            run.append(following)
+            bound = min(bound, (following.Label.SelfPrime - 1 - low) // len(run))
+            least = 2
+            if bound < least:
+                return None
+        else:
+            orders = []
+            for node in run:
+                orders.append(max(orders[-1] + 1 if orders else low + 1, self.Order(node.Label.SelfPrime)))
+            if any(order >= node.Label.SelfPrime for order, node in zip(orders, run)):
+                return None
+        for node, order in zip(run[len(newNodes):], orders[len(newNodes):]):
+            moved[node.Label] = order
+        return orders[:len(newNodes)]
+
+    @staticmethod
+    def Following(parent, position):
+        # Nodes after position among parent's children in document order, up
+        # to the end of the document
+        node = parent
+        while node is not None:
+            for child in itertools.islice(node.Children, position, None):
+                stack = [child]
+                while stack:
+                    current = stack.pop()
+                    yield current
+                    stack.extend(reversed(current.Children))
+            if node.Parent is not None:
+                position = node.Parent.Children.index(node) + 1
+            node = node.Parent
+
+    def InsertNode(self, parent, newNode):
+        parent.AddChild(newNode)
+
+    def InsertLabeledNode(self, parent, newNode):
+        return self.InsertAt(parent, len(parent.Children), newNode)
+
+    def InsertBefore(self, parent, sibling, newNode):
+        return self.InsertAt(parent, parent.Children.index(sibling), newNode)
+
+    def InsertAfter(self, parent, sibling, newNode):
+        return self.InsertAt(parent, parent.Children.index(sibling) + 1, newNode)
+
+    def InsertAt(self, parent, index, newNode):
+        return self.InsertMany(parent, [newNode], [index])
+
+    def InsertMany(self, parent, nodes, positions=None):
+        # Insert subtrees under parent: positions index parent's current
+        # children (default: append after them), and nodes given the same
+        # position keep their order. New nodes take the next self-primes and
+        # orders from Place, and join the last SC groups; the groups of the
+        # nodes Place moves up are solved again once for the whole batch.
+        # Returns the number of labels and SC values written
+        with PROFILER.Span("insert"):
+            siblings = parent.Children
+            if positions is None:
+                positions = [len(siblings)] * len(nodes)
+            runs = {}
+            for position, node in sorted(zip(positions, nodes), key=lambda pair: pair[0]):
+                runs.setdefault(position, []).append(node)
+            moved = {}
+            groups = set()
+            written = 0
+            placed = True
+            # Lowest position first: a run's orders bound the next run's, and
+            # runs are only linked in below once all are placed
+            for position, run in sorted(runs.items()):
+                newNodes = []
+                for node in run:
+                    node.Label = self.NewLabel(parent.Label.Value)
+                    newNodes.extend(self.LabelChildren(node))
+                orders = self.Place(parent, position, newNodes, moved)
+                if orders is None:
+                    placed = False
+                    break
+                for newNode, order in zip(newNodes, orders):
+                    self.AddOrder(newNode.Label, order)
+                    groups.add(newNode.Label.Group)
+                written += len(newNodes)
+            PROFILER.Count("insert", written, written)
+            # Highest position first, so the lower ones still index old children
+            for position in sorted(runs, reverse=True):
+                parent.InsertChildren(position, runs[position])
+            if not placed:
+                # A node would have to reach its self-prime: label everything
+                # again, which writes every label and SC value
+                self.label_tree(self.root)
+                written = len(XmlLabeler.CollectNodes(self.root)) + len(self.scValues)
+            else:
+                moves = {}
+                for label, order in moved.items():
+                    moves.setdefault(label.Group, {})[label.SelfPrime] = order
+                for g, orders in moves.items():
+                    sc = self.scValues[g]
+                    self.scValues[g] = self.Crt(self.groups[g], [orders.get(p, sc % p) for p in self.groups[g]])
+                groups.update(moves)
+                written += len(groups)
+            if self.index is not None:
+                # Document orders are final only now
+                self.index.InsertSubtrees(nodes, self.OrderKey)
+            return written
+
+    def LabelChildren(self, node):
+        # Labels node's descendants under node's label with the next
+        # self-primes; returns node's subtree in document order
+        nodes = []
+
+        def enter(current, parentValue, position):
+            if position > 0:
+                current.Label = self.NewLabel(parentValue)
+            nodes.append(current)
+            return current.Label.Value
+
+        TreeWalker.Walk(node, enter)
+        return nodes
+
+    def DeleteSubtree(self, parent, node):
+        # Detach node's subtree from parent and drop its self-primes from their
+        # SC groups. Its orders are free again for later insertions there,
+        # and orders after it stay as they are. The primes are retired
+        # rather than handed out again, since a reused prime could be
+        # smaller than the order it would have to hold. Returns the number
+        # of SC values rewritten; no label changes
+        if self.index is not None:
+            self.index.RemoveSubtree(node, self.OrderKey)
+        parent.RemoveChild(node)
+        removed = {}
+        for current in XmlLabeler.CollectNodes(node):
+            removed.setdefault(current.Label.Group, set()).add(current.Label.SelfPrime)
+        for g, primes in removed.items():
+            sc = self.scValues[g]
+            kept = [p for p in self.groups[g] if p not in primes]
+            self.groups[g] = kept
+            self.scValues[g] = self.Crt(kept, [sc % p for p in kept])
+        return len(removed)
+
+    def MoveSubtree(self, parent, node, newParent, index=None):
+        # Detach node's subtree and insert it under newParent at index among
+        # the children left there (default: last), with new self-primes and
+        # orders; returns the number of labels and SC values written
+        if node is newParent or self.IsAncestor(node, newParent):
+            raise ValueError("Cannot move a subtree into itself")
+        touched = self.DeleteSubtree(parent, node)
+        if index is None:
+            index = len(newParent.Children)
+        return touched + self.InsertAt(newParent, index, node)
+
+    def IsAncestor(self, a, b):
+        return a.Label.Value != b.Label.Value and b.Label.Value % a.Label.Value == 0
+
+    def IsParent(self, a, b):
+        return b.Label.Value == a.Label.Value * b.Label.SelfPrime
+
+    def RootLabel(self):
+        self.nextPrime = self.offset
+        return PrimeLabel(1, 1)
+
+    def ChildLabel(self, pLabel, j):
+        # Self-primes are handed out in document order, as in label_tree;
+        # no SC values are kept when labeling a stream
+        return self.NewLabel(pLabel.Value)
+
+    def LabelSubtrees(self, nodes, pLabel, before, position):
+        # Label a run of pLabel's children as ChildLabel would in a stream:
+        # the before - 1 non-root nodes ahead of the run in document order
+        # have used up the self-primes up to there
+        def enter(node, parentLabel, j):
+            node.Label = self.ChildLabel(parentLabel, j)
+            return node.Label
+
+        self.nextPrime = self.offset + before - 1
+        for node in nodes:
+            TreeWalker.Walk(node, enter, state=pLabel)
+
+    def OrderKey(self, node):
+        return self.DocumentOrder(node)
+
+    def ParentKey(self, node):
+        # The parent's label is the node's label without its self-prime
+        if node.Label.Group is None:
+            return None
+        return node.Label.Value // node.Label.SelfPrime
+
+class StreamLabeler:
+    # Labels a document straight from ET.iterparse and writes it out as it
+    # goes; only the elements on the current root-to-node path stay in memory
+    def __init__(self, labeler):
+        self.labeler = labeler
+
+    def LabelFile(self, input_path, output_path, indent="  ", label_format="text"):
+        with PROFILER.Span("stream"):
+            writer = LabeledXmlWriter(output_path, indent, label_format)
+            count = 0
+            for event, element, label in self.Events(input_path):
+                if event == "start":
+                    writer.StartElement(element, label)
+                    count += 1
+                else:
+                    writer.EndElement()
+            writer.Close()
+        PROFILER.Count("stream", count, count)
+        return count
+
+    def Events(self, input_path):
+        # (event, element, label) for every start and end event of
+        # ET.iterparse, label None on end events; an element is released
+        # once its end event has been handled
+        path = []  # [element, label, children seen] per open element
+        for event, element in ET.iterparse(input_path, events=("start", "end")):
+            if event == "start":
+                if path:
+                    parent = path[-1]
+                    parent[2] += 1
+                    label = self.labeler.ChildLabel(parent[1], parent[2])
+                else:
+                    label = self.labeler.RootLabel()
+                path.append([element, label, 0])
+                yield event, element, label
+            else:
+                path.pop()
+                yield event, element, None
+                # Drop the finished element so memory follows depth, not size
+                element.clear()
+                if path:
+                    path[-1][0].remove(element)
+
+class ChunkedLabeler(core.ChunkedLabeler):
+    # core.ChunkedLabeler over the Dewey and prime number labelers, which
+    # label a run of records from its position and the nodes ahead of it
+    StreamLabeler = StreamLabeler
+
+    def RootLabel(self, total):
+        return self.labeler.RootLabel()
+
+    def LabelRecords(self, nodes, rootLabel, before, position):
+        self.labeler.LabelSubtrees(nodes, rootLabel, before, position)
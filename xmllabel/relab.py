@@ -0,0 +1,552 @@
+import xml.etree.ElementTree as ET
+import os
+import bisect
+import array
+from concurrent.futures import ProcessPoolExecutor
+from . import core
+from .core import TreeWalker, LabeledXmlWriter, Varint, PROFILER
+
+class ReLabLabel:
+    def __init__(self, level, ordinal, rid):
+        self.Level = level
+        self.Ordinal = ordinal
+        self.RID = rid
+    
+    def __str__(self):
+        return f"[{self.Level},{self.Ordinal},{self.RID}]"
+
+    def Pack(self):
+        return ReLabCodec.Encode(self)
+
+class DocumentStore(core.DocumentStore):
+    # core.DocumentStore with the labels in Ordinal and RID columns beside
+    # the Level one; StoreLabel is the ReLabLabel view of a row
+    def __init__(self):
+        super().__init__()
+        self.Ordinal = array.array("q")
+        self.RID = array.array("q")
+
+    def AddLabel(self):
+        self.Ordinal.append(0)
+        self.RID.append(0)
+
+    def GetLabel(self, i):
+        return StoreLabel(self, i)
+
+    def SetLabel(self, i, label):
+        self.Level[i] = label.Level
+        self.Ordinal[i] = label.Ordinal
+        self.RID[i] = label.RID
+
+class StoreLabel:
+    # ReLabLabel view that reads and writes the store's label columns
+    __slots__ = ("Store", "Id")
+
+    def __init__(self, store, i):
+        self.Store = store
+        self.Id = i
+
+    @property
+    def Level(self):
+        return self.Store.Level[self.Id]
+
+    @Level.setter
+    def Level(self, level):
+        self.Store.Level[self.Id] = level
+
+    @property
+    def Ordinal(self):
+        return self.Store.Ordinal[self.Id]
+
+    @Ordinal.setter
+    def Ordinal(self, ordinal):
+        self.Store.Ordinal[self.Id] = ordinal
+
+    @property
+    def RID(self):
+        return self.Store.RID[self.Id]
+
+    @RID.setter
+    def RID(self, rid):
+        self.Store.RID[self.Id] = rid
+
+    def __str__(self):
+        return f"[{self.Level},{self.Ordinal},{self.RID}]"
+
+    def Pack(self):
+        return ReLabCodec.Encode(self)
+
+class ReLabCodec:
+    # Binary ReLab labels: Ordinal, RID and Level as order-preserving
+    # varints (see core.Varint). Ordinal comes first and is unique, so plain
+    # bytes comparison follows document order.
+    @staticmethod
+    def Encode(label):
+        return (Varint.Encode(label.Ordinal) + Varint.Encode(label.RID)
+                + Varint.Encode(label.Level))
+
+    @staticmethod
+    def Decode(data):
+        ordinal, rid, level = ReLabCodec.Fields(data)
+        return ReLabLabel(level, ordinal, rid)
+
+    @staticmethod
+    def Fields(data):
+        # (Ordinal, RID, Level) straight from the bytes
+        fields = []
+        i = 0
+        for _ in range(3):
+            size = Varint.Size(data[i])
+            fields.append(Varint.Decode(data[i:i + size]))
+            i += size
+        return fields
+
+    @staticmethod
+    def Compare(a, b):
+        return (a > b) - (a < b)
+
+    @staticmethod
+    def IsAncestor(a, b):
+        # Encoded fields compare like the numbers, so no decoding is needed
+        ordinalEnd = Varint.Size(a[0])
+        ridEnd = ordinalEnd + Varint.Size(a[ordinalEnd])
+        return a[:ordinalEnd] < b[:Varint.Size(b[0])] <= a[ordinalEnd:ridEnd]
+
+    @staticmethod
+    def IsParent(a, b):
+        return ReLabCodec.IsAncestor(a, b) and ReLabCodec.Fields(b)[2] == ReLabCodec.Fields(a)[2] + 1
+
+class ReLab:
+    MAX_ORDINAL = 1 << 62  # within the store's signed 64-bit columns
+
+    def __init__(self, gap=1, index=None):
+        self.currentOrdinal = 0
+        # Ordinal spacing; gap - 1 free ordinals follow every node so later
+        # inserts can be numbered without touching existing labels
+        self.gap = gap
+        self.root = None
+        # Optional TagIndex kept in step with every insert, delete and move
+        self.index = index
+    
+    def LabelTree(self, root):
+        self.currentOrdinal = 0  # Reset ordinal counter
+        self.root = root
+        with PROFILER.Span("label"):
+            self.AssignLabels(root, 0)
+        count = self.currentOrdinal // self.gap
+        PROFILER.Count("label", count, count)
+    
+    def AssignLabels(self, node, level):
+        def enter(current, parentLevel, position):
+            self.currentOrdinal += self.gap
+            current.Label = ReLabLabel(parentLevel + 1, self.currentOrdinal, 0)
+            return parentLevel + 1
+
+        def leave(current, currentLevel):
+            # Every ordinal in the subtree has been handed out by now, so the
+            # counter is the subtree's largest ordinal
+            current.Label.RID = self.currentOrdinal
+
+        TreeWalker.Walk(node, enter, leave, level - 1)
+
+    def LabelSubtrees(self, nodes, before):
+        # Label a run of the root's children as LabelTree would, given the
+        # number of nodes ahead of the run in document order, root included
+        self.currentOrdinal = before * self.gap
+        for node in nodes:
+            self.AssignLabels(node, 1)
+
+    def LabelStore(self, store):
+        # Same labels as LabelTree, straight on the store's columns: ids are
+        # in document order, so the ordinal is (id + 1) * gap and the RID is
+        # the ordinal of the subtree's last id, taken from the last child
+        gap = self.gap
+        n = len(store)
+        with PROFILER.Span("label"):
+            last = array.array("q", range(n))
+            for i in range(n - 1, -1, -1):
+                child = store.LastChild[i]
+                if child >= 0:
+                    last[i] = last[child]
+            store.Ordinal = array.array("q", range(gap, (n + 1) * gap, gap))
+            store.RID = array.array("q", [(i + 1) * gap for i in last])
+        PROFILER.Count("label", n, n)
+        self.currentOrdinal = n * gap
+        self.root = store.Node(0)
+
+    def LabelStoreParallel(self, store, workers=None):
+        # LabelStore with the root's subtrees spread over a process pool.
+        # The ordinal column only depends on the id, so just the RID scans
+        # run in the workers, each on its own chunk's LastChild slice, and
+        # the chunks' RID columns are concatenated in id order
+        gap = self.gap
+        n = len(store)
+        chunks = store.Partition(workers or os.cpu_count() or 1)
+        store.Ordinal = array.array("q", range(gap, (n + 1) * gap, gap))
+        store.RID = array.array("q", [n * gap] if n else [])
+        with ProcessPoolExecutor(workers) as pool:
+            results = pool.map(ReLab.LabelChunk, [store.LastChild[lo:hi] for lo, hi, _ in chunks],
+                               [lo for lo, _, _ in chunks], [gap] * len(chunks))
+            for rids in results:
+                store.RID.extend(rids)
+        self.currentOrdinal = n * gap
+        self.root = store.Node(0)
+
+    @staticmethod
+    def LabelChunk(lastChild, lo, gap):
+        # RIDs of the ids lo .. lo + len(lastChild) - 1, which together hold
+        # whole subtrees, so every last child is inside the chunk
+        last = array.array("q", range(lo, lo + len(lastChild)))
+        for i in range(len(lastChild) - 1, -1, -1):
+            child = lastChild[i]
+            if child >= 0:
+                last[i] = last[child - lo]
+        return array.array("q", [(i + 1) * gap for i in last])
+
+    @staticmethod
+    def IsAncestor(a, b):
+        return a.Label.Ordinal < b.Label.Ordinal <= a.Label.RID
+
+    @staticmethod
+    def OrderKey(node):
+        return node.Label.Ordinal
+
+    @staticmethod
+    def IsParent(a, b):
+        return ReLab.IsAncestor(a, b) and b.Label.Level == a.Label.Level + 1
+    
+    def InsertNode(self, parent, newNode):
+        if self.index is not None:
+            self.index.InsertSubtree(newNode, self.LastOrdinal(parent, len(parent.Children)))
+        parent.AddChild(newNode)
+        # self.LabelTree(parent)  # Relabel the tree after insertion
+
+    def InsertLabeled(self, parent, node, position=None):
+        # Number only the new subtree inside the ordinal gap at the insertion
+        # point, in the middle of it; returns how many labels were written or changed
+        with PROFILER.Span("insert"):
+            if position is None:
+                position = len(parent.Children)
+            low = self.LastOrdinal(parent, position)
+            high = self.NextOrdinal(parent, position)
+
+            parent.InsertChild(position, node)
+            nodes = XmlLabeler.CollectNodes(node)
+            if high is None:
+                step = self.gap
+            else:
+                step = min(self.gap, (high - low) // (len(nodes) + 1))
+                # Centered in the gap, so it keeps room on both sides
+                low += (high - low - (len(nodes) + 1) * step) // 2
+            if step < 1:
+                # Gap exhausted: renumber the smallest subtree around parent with room
+                touched = self.RenumberRegion(parent)
+                ancestor = None
+            else:
+                for i, newNode in enumerate(nodes, 1):
+                    newNode.Label = ReLabLabel(0, low + i * step, 0)
+                self.SetSubtreeLevels(node, parent.Label.Level + 1)
+                touched = len(nodes)
+                ancestor, rID = parent, node.Label.RID
+
+            # Widen the RID range of every ancestor that now ends earlier
+            while ancestor is not None and ancestor.Label.RID < rID:
+                ancestor.Label.RID = rID
+                touched += 1
+                ancestor = ancestor.Parent
+            if self.index is not None:
+                self.index.InsertSubtrees([node], ReLab.OrderKey)
+            PROFILER.Count("insert", len(nodes), touched)
+            return touched
+
+    def InsertMany(self, parent, nodes, positions=None):
+        # Insert several subtrees under parent in one pass. positions index
+        # parent's current children (default: append after them), and nodes
+        # given the same position keep their order. Each run of new subtrees
+        # between two old siblings is numbered inside the ordinal gap there;
+        # if a run does not fit, the smallest subtree around parent whose
+        # ordinal range has room is renumbered, once for the whole batch.
+        # Returns how many labels were written or changed
+        with PROFILER.Span("insert"):
+            if positions is None:
+                positions = [len(parent.Children)] * len(nodes)
+            runs = {}
+            for position, node in sorted(zip(positions, nodes), key=lambda pair: pair[0]):
+                runs.setdefault(position, []).append(node)
+            plans = []
+            for position, run in runs.items():
+                low = self.LastOrdinal(parent, position)
+                high = self.NextOrdinal(parent, position)
+                runNodes = [newNode for node in run for newNode in XmlLabeler.CollectNodes(node)]
+                step = self.gap if high is None else min(self.gap, (high - low) // (len(runNodes) + 1))
+                if high is not None:
+                    low += (high - low - (len(runNodes) + 1) * step) // 2
+                plans.append((position, run, runNodes, low, step))
+            # Highest position first, so the lower ones still index old children
+            for position, run, _, _, _ in reversed(plans):
+                parent.InsertChildren(position, run)
+
+            if all(step >= 1 for _, _, _, _, step in plans):
+                touched = 0
+                for _, run, runNodes, low, step in plans:
+                    for i, newNode in enumerate(runNodes, 1):
+                        newNode.Label = ReLabLabel(0, low + i * step, 0)
+                    for node in run:
+                        self.SetSubtreeLevels(node, parent.Label.Level + 1)
+                    touched += len(runNodes)
+                ancestor = parent
+                rID = max((runNodes[-1].Label.Ordinal for _, _, runNodes, _, _ in plans), default=0)
+            else:
+                touched = self.RenumberRegion(parent)
+                ancestor = None
+
+            # Widen the RID range of every ancestor that now ends earlier
+            while ancestor is not None and ancestor.Label.RID < rID:
+                ancestor.Label.RID = rID
+                touched += 1
+                ancestor = ancestor.Parent
+            if self.index is not None:
+                self.index.InsertSubtrees(nodes, ReLab.OrderKey)
+            PROFILER.Count("insert", sum(len(runNodes) for _, _, runNodes, _, _ in plans), touched)
+            return touched
+
+    def DeleteSubtree(self, node):
+        # Detach node's subtree. Its ordinals join the gap between the nodes
+        # around it, for later inserts there; ancestors whose RID was the
+        # subtree's last ordinal shrink theirs to the last node left in
+        # their subtree, or the next insert after them would fall inside
+        # their range. Returns how many surviving labels changed
+        parent = node.Parent
+        if self.index is not None:
+            self.index.RemoveSubtree(node, ReLab.OrderKey)
+        parent.RemoveChild(node)
+        rID = self.LastOrdinal(parent, len(parent.Children))
+        touched = 0
+        ancestor = parent
+        while ancestor is not None and ancestor.Label.RID == node.Label.RID:
+            ancestor.Label.RID = rID
+            touched += 1
+            ancestor = ancestor.Parent
+        return touched
+
+    def MoveSubtree(self, node, parent, position=None):
+        # Detach node's subtree and insert it under parent at position among
+        # the children left there (default: last). The subtree is numbered
+        # again in the gap at its new place; returns how many labels changed
+        if node is parent or self.IsAncestor(node, parent):
+            raise ValueError("Cannot move a subtree into itself")
+        touched = self.DeleteSubtree(node)
+        return touched + self.InsertLabeled(parent, node, position)
+
+    def RenumberRegion(self, node):
+        # Renumber the smallest subtree around node whose ordinal range, from
+        # its root's ordinal up to the next node after it, holds all of its
+        # nodes at least 2 apart, spread evenly over that range, so that
+        # free ordinals are left behind for the next inserts there. The
+        # whole document has no upper end: it is spread twice as wide as it
+        # is now, and at least gap apart (up to MAX_ORDINAL), so a run of
+        # inserts renumbers it a logarithmic number of times, not every
+        # time. The root keeps its ordinal, so nothing outside changes but
+        # the RIDs of the ancestors whose subtree ends with it. Returns how
+        # many labels changed
+        while True:
+            count = len(XmlLabeler.CollectNodes(node))
+            parent = node.Parent
+            if parent is None:
+                spacing = -(-(node.Label.RID - node.Label.Ordinal) // max(count - 1, 1))
+                step = min(max(self.gap, 2 * spacing, 2), (ReLab.MAX_ORDINAL - node.Label.Ordinal) // count)
+                break
+            high = self.NextOrdinal(parent, parent.Children.index(node) + 1)
+            step = (high - node.Label.Ordinal) // count if high is not None else max(self.gap, 2)
+            if step >= 2:
+                break
+            node = parent
+        ordinal = node.Label.Ordinal - step
+
+        def enter(current, parentLevel, position):
+            nonlocal ordinal
+            ordinal += step
+            current.Label = ReLabLabel(parentLevel + 1, ordinal, 0)
+            return parentLevel + 1
+
+        def leave(current, currentLevel):
+            current.Label.RID = ordinal
+
+        TreeWalker.Walk(node, enter, leave, node.Label.Level - 1)
+        # A step below the gap can end the subtree earlier than before
+        while node.Parent is not None and node.Parent.Children[-1] is node:
+            node = node.Parent
+            node.Label.RID = ordinal
+            count += 1
+        return count
+
+    def SetSubtreeLevels(self, node, level):
+        # Sets levels and RID (largest ordinal in the subtree) of a new subtree
+        def enter(current, parentLevel, position):
+            current.Label.Level = parentLevel + 1
+            return parentLevel + 1
+
+        def leave(current, currentLevel):
+            current.Label.RID = max([current.Label.Ordinal] + [child.Label.RID for child in current.Children])
+
+        TreeWalker.Walk(node, enter, leave, level - 1)
+        return node.Label.RID
+
+    @staticmethod
+    def LastOrdinal(parent, position):
+        # Ordinal of the last node before the insertion point in document order
+        last = parent.Children[position-1] if position > 0 else parent
+        while last is not parent and last.Children:
+            last = last.Children[-1]
+        return last.Label.Ordinal
+
+    @staticmethod
+    def NextOrdinal(parent, position):
+        # Ordinal of the first node after the insertion point in document order
+        if position < len(parent.Children):
+            return parent.Children[position].Label.Ordinal
+        node = parent
+        while node.Parent is not None:
+            siblings = node.Parent.Children
+            index = siblings.index(node) + 1
+            if index < len(siblings):
+                return siblings[index].Label.Ordinal
+            node = node.Parent
+        return None
+
+class StreamLabeler:
+    # Labels a document straight from ET.iterparse and writes it out as it
+    # goes.  A RID is only known once its subtree ends, after the start tag
+    # is due, so a first pass records one RID per element in a compact
+    # array; apart from that only the open root-to-node path stays in memory
+    def __init__(self, relab):
+        self.relab = relab
+
+    def LabelFile(self, input_path, output_path, indent="  ", label_format="text"):
+        with PROFILER.Span("stream"):
+            writer = LabeledXmlWriter(output_path, indent, label_format)
+            count = 0
+            for event, element, label in self.Events(input_path):
+                if event == "start":
+                    writer.StartElement(element, label)
+                    count += 1
+                else:
+                    writer.EndElement()
+            writer.Close()
+        PROFILER.Count("stream", count, count)
+        return count
+
+    def Events(self, input_path):
+        # (event, element, label) for every start and end event of the
+        # second pass, label None on end events; an element is released once
+        # its end event has been handled
+        gap = self.relab.gap
+        rids = array.array("q")
+        open_positions = []
+        path = []
+        for event, element in ET.iterparse(input_path, events=("start", "end")):
+            if event == "start":
+                open_positions.append(len(rids))
+                rids.append(0)
+                path.append(element)
+            else:
+                # Position of the last element started inside this subtree
+                rids[open_positions.pop()] = len(rids) * gap
+                StreamLabeler.Release(path)
+
+        count = 0
+        for event, element in ET.iterparse(input_path, events=("start", "end")):
+            if event == "start":
+                count += 1
+                yield event, element, ReLabLabel(len(path), count * gap, rids[count-1])
+                path.append(element)
+            else:
+                yield event, element, None
+                StreamLabeler.Release(path)
+
+    @staticmethod
+    def Release(path):
+        # Drop the finished element so memory follows depth, not size
+        element = path.pop()
+        element.clear()
+        if path:
+            path[-1].remove(element)
+
+class ChunkedLabeler(core.ChunkedLabeler):
+    # core.ChunkedLabeler over ReLab, which numbers a run of records from the
+    # count of nodes ahead of it
+    StreamLabeler = StreamLabeler
+
+    def RootLabel(self, total):
+        # The root spans every ordinal, and later inserts continue after them
+        gap = self.labeler.gap
+        self.labeler.currentOrdinal = total * gap
+        return ReLabLabel(0, gap, total * gap)
+
+    def LabelRecords(self, nodes, rootLabel, before, position):
+        self.labeler.LabelSubtrees(nodes, before)
+
+class TagIndex(core.TagIndex):
+    # core.TagIndex that also takes ReLab's unlabeled appends (InsertNode);
+    # document order is Ordinal order
+    def InsertSubtree(self, node, after):
+        # Place a new subtree's nodes right behind the entries whose Ordinal
+        # is at most `after`, the last node preceding it in document order
+        newNodes = XmlLabeler.CollectNodes(node)
+        groups = {}
+        for newNode in newNodes:
+            groups.setdefault(newNode.Name, []).append(newNode)
+        groups = [(self.Tags.setdefault(tag, []), group) for tag, group in groups.items()]
+        for nodes, group in groups + [(self.AllNodes, newNodes)]:
+            i = bisect.bisect_right(nodes, after, key=lambda n: n.Label.Ordinal)
+            nodes[i:i] = group
+
+class PathQuery(core.PathQuery):
+    # core.PathQuery joined by [Ordinal, RID] containment
+    OrderKey = staticmethod(ReLab.OrderKey)
+    IsAncestor = staticmethod(ReLab.IsAncestor)
+
+    @staticmethod
+    def IsParent(a, b):
+        # Only asked about an ancestor a of b
+        return a.Label.Level + 1 == b.Label.Level
+
+class XmlLabeler(core.XmlLabeler):
+    # core.XmlLabeler with the store and path query entry points of ReLab
+    @staticmethod
+    def BuildStore(element):
+        return core.XmlLabeler.BuildStore(element, DocumentStore())
+
+    @staticmethod
+    def QueryNodes(root, path, index=None):
+        # "//" steps and predicates are always answered from a tag index;
+        # counts the nodes it returns
+        with PROFILER.Span("query"):
+            steps = PathQuery.Parse(path)
+            simple = all(axis == "child" and not predicates for axis, tag, predicates in steps)
+            if index is None and not simple:
+                index = TagIndex.FromTree(root)
+            if index is not None:
+                result = PathQuery(index).Run(root, path)
+            else:
+                result = XmlLabeler.QueryNodesByDescent(root, [tag for axis, tag, predicates in steps])
+        PROFILER.Count("query", len(result))
+        return result
+    
+    @staticmethod
+    def QueryNodesByDescent(root, path_parts):
+        # Descends only through nodes that match the path so far
+        result = []
+
+        def enter(current, parentLevel, position):
+            level = parentLevel + 1
+            current_path_part = path_parts[level]
+            if current.Name != current_path_part and current_path_part != "*":
+                return None
+            if level == len(path_parts) - 1:
+                result.append(current)
+                return None
+            return level
+
+        TreeWalker.Walk(root, enter, state=-1)
+        return result
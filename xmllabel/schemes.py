@@ -0,0 +1,181 @@
+from abc import ABC, abstractmethod
+from . import prime, relab
+
+class Scheme(ABC):
+    # A labeling scheme behind the calls the CLI and the benchmark make,
+    # whatever its labeler's own API looks like. Labeler is the wrapped
+    # labeler and Family the module holding the scheme's XmlLabeler (store
+    # and query entry points), TagIndex, StreamLabeler and ChunkedLabeler.
+    # Insert, InsertMany, Delete and Move return how many labels they wrote
+    # or changed, in the scheme's Touched unit, and keep the labeler's tag
+    # index (see TagIndex) current. A new scheme plugs in by
+    # subclassing Scheme, defining its abstract methods and adding itself
+    # to SCHEMES
+    Name = None
+    Family = None
+    Touched = "labels"
+
+    def __init__(self, labeler):
+        self.Labeler = labeler
+
+    @abstractmethod
+    def LabelTree(self, root):
+        ...
+
+    @abstractmethod
+    def LabelStore(self, store, parallel=False, workers=None):
+        # parallel labels the store on a pool of workers processes (default
+        # one per CPU)
+        ...
+
+    @abstractmethod
+    def Insert(self, parent, position, node):
+        ...
+
+    @abstractmethod
+    def InsertMany(self, parent, nodes, positions=None):
+        ...
+
+    @abstractmethod
+    def Delete(self, node):
+        ...
+
+    @abstractmethod
+    def Move(self, node, parent, position=None):
+        ...
+
+    @abstractmethod
+    def IsAncestor(self, a, b):
+        ...
+
+    @abstractmethod
+    def Query(self, root, path, index=None):
+        ...
+
+    @abstractmethod
+    def PathQuery(self, index):
+        # The family's PathQuery over index, joining through these labels
+        ...
+
+    def Join(self, root, ancestorTag, descendantTag, childOnly=False, index=None):
+        # Every (ancestor, descendant) pair - (parent, child) with childOnly -
+        # of two tags ("*" for any), from one structural join of their tag
+        # lists, in descendant order
+        if index is None:
+            index = self.TagIndex(root)
+        return self.PathQuery(index).JoinPairs(index.Get(ancestorTag), index.Get(descendantTag), childOnly)
+
+    def BuildStore(self, element):
+        return self.Family.XmlLabeler.BuildStore(element)
+
+    def TagIndex(self, root):
+        # The tag index of root's tree the labeler keeps current, built on
+        # first use; Query uses it when given no index
+        return self.Family.TagIndex.Kept(self.Labeler, root)
+
+    def StreamLabeler(self):
+        return self.Family.StreamLabeler(self.Labeler)
+
+    def ChunkedLabeler(self, workers=None):
+        return self.Family.ChunkedLabeler(self.Labeler, workers)
+
+class DeweyScheme(Scheme):
+    # Dewey labels from PrimeLabeler, sibling ordinals gap apart
+    Name = "dewey"
+    Family = prime
+
+    def __init__(self, gap=1, index=None):
+        super().__init__(prime.PrimeLabeler(gap, index))
+
+    def LabelTree(self, root):
+        self.Labeler.label_tree(root, self.Labeler.RootLabel())
+
+    def LabelStore(self, store, parallel=False, workers=None):
+        if parallel:
+            self.Labeler.LabelStoreParallel(store, self.Labeler.RootLabel(), workers)
+        else:
+            self.Labeler.label_tree(store.Node(0), self.Labeler.RootLabel())
+
+    def Insert(self, parent, position, node):
+        return self.Labeler.InsertAt(parent, position, node)
+
+    def InsertMany(self, parent, nodes, positions=None):
+        return self.Labeler.InsertMany(parent, nodes, positions)
+
+    def Delete(self, node):
+        return self.Labeler.DeleteSubtree(node.Parent, node)
+
+    def Move(self, node, parent, position=None):
+        return self.Labeler.MoveSubtree(node.Parent, node, parent, position)
+
+    def IsAncestor(self, a, b):
+        return self.Labeler.IsAncestor(a, b)
+
+    def Query(self, root, path, index=None):
+        return self.Family.XmlLabeler.QueryNodes(root, path, self.Labeler, index)
+
+    def PathQuery(self, index):
+        return prime.PathQuery(index, self.Labeler)
+
+class PrimeScheme(DeweyScheme):
+    # Prime number labels from PrimeNumberLabeler, which takes the same
+    # calls as the Dewey labeler; insertions write the new labels and the
+    # SC values that hold their document orders
+    Name = "prime"
+    Touched = "labels and SC values"
+
+    def __init__(self, gap=1, index=None):
+        if gap != 1:
+            raise ValueError("Prime number labels have no ordinal gap")
+        Scheme.__init__(self, prime.PrimeNumberLabeler(index=index))
+
+    def LabelTree(self, root):
+        self.Labeler.label_tree(root)
+
+    def LabelStore(self, store, parallel=False, workers=None):
+        if parallel:
+            self.Labeler.LabelStoreParallel(store, workers=workers)
+        else:
+            self.Labeler.label_tree(store.Node(0))
+
+class ReLabScheme(Scheme):
+    # (Level, Ordinal, RID) labels from ReLab, ordinals gap apart
+    Name = "relab"
+    Family = relab
+
+    def __init__(self, gap=1, index=None):
+        super().__init__(relab.ReLab(gap, index))
+
+    def LabelTree(self, root):
+        self.Labeler.LabelTree(root)
+
+    def LabelStore(self, store, parallel=False, workers=None):
+        if parallel:
+            self.Labeler.LabelStoreParallel(store, workers)
+        else:
+            self.Labeler.LabelStore(store)
+
+    def Insert(self, parent, position, node):
+        return self.Labeler.InsertLabeled(parent, node, position)
+
+    def InsertMany(self, parent, nodes, positions=None):
+        return self.Labeler.InsertMany(parent, nodes, positions)
+
+    def Delete(self, node):
+        return self.Labeler.DeleteSubtree(node)
+
+    def Move(self, node, parent, position=None):
+        return self.Labeler.MoveSubtree(node, parent, position)
+
+    def IsAncestor(self, a, b):
+        return relab.ReLab.IsAncestor(a, b)
+
+    def Query(self, root, path, index=None):
+        if index is None:
+            index = self.TagIndex(root)
+        return self.Family.XmlLabeler.QueryNodes(root, path, index)
+
+    def PathQuery(self, index):
+        return relab.PathQuery(index)
+
+SCHEMES = {scheme.Name: scheme for scheme in (DeweyScheme, PrimeScheme, ReLabScheme)}
@@ -0,0 +1,255 @@
+from xml.etree.ElementTree import Element
+import argparse
+import bisect
+import itertools
+import math
+import os
+import random
+import time
+from .core import XmlNode
+
+class Distribution:
+    # Integer-valued random distribution written as "fixed:N" (or just "N"),
+    # "uniform:LO-HI" or "geometric:MEAN" (values from 1 up, mean MEAN)
+    KINDS = ("fixed", "uniform", "geometric")
+
+    def __init__(self, spec):
+        kind, _, value = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        if kind not in Distribution.KINDS:
+            raise ValueError(f"Unknown distribution: {spec}")
+        self.Spec = spec
+        self.kind = kind
+        if kind == "uniform":
+            low, _, high = value.partition("-")
+            self.low, self.high = int(low), int(high)
+        elif kind == "geometric":
+            mean = float(value)
+            self.logFail = math.log(1 - 1 / mean) if mean > 1 else None
+        else:
+            self.value = int(value)
+
+    def Sample(self, rng):
+        if self.kind == "uniform":
+            return rng.randint(self.low, self.high)
+        if self.kind == "geometric":
+            if self.logFail is None:
+                return 1
+            return 1 + int(math.log(1.0 - rng.random()) / self.logFail)
+        return self.value
+
+class TreeShape:
+    # Random document with exactly `nodes` elements. Every element gets the
+    # number of elements in its subtree as a budget and splits the rest of
+    # it among a fanout-distributed number of children, "even"ly or at
+    # "random" (so subtree sizes, and with them depths, vary), until a
+    # budget of 1 makes a leaf. Children of depth max_depth - 1 take their
+    # whole budget as leaves, so max_depth caps the depth and fanout sets
+    # how fast it is reached: wsu is about max_depth=3 with a wide fanout,
+    # SwissProt a bushier fanout=uniform:2-12 with max_depth=6. depth, a
+    # Distribution, varies the cap per branch instead: each child of the
+    # root draws the depth its subtree's leaves stop at (2 at least, and
+    # no more than max_depth), so one document mixes shallow and deep
+    # records. Tags are
+    # drawn from `tags` names with Zipf weights 1 / rank ** tag_skew, and
+    # leaves get text of a text-distributed length.
+    # Events() runs in pre-order with a stack of pending budgets, so a file
+    # of any size is written without holding the tree.
+    TEXT = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor " * 64
+
+    def __init__(self, nodes, fanout="uniform:2-12", max_depth=None, depth=None, split="random",
+                 tags=32, tag_skew=1.0, text="geometric:8", seed=0):
+        if nodes < 1:
+            raise ValueError("A document needs at least one element")
+        if max_depth is not None and max_depth < 1 and nodes > 1:
+            raise ValueError("max_depth below 1 leaves no room for children")
+        if split not in ("even", "random"):
+            raise ValueError(f"Unknown split: {split}")
+        self.Nodes = nodes
+        self.Fanout = Distribution(fanout)
+        self.MaxDepth = max_depth
+        self.Depth = Distribution(depth) if depth is not None else None
+        self.SplitKind = split
+        self.Tags = [f"t{i}" for i in range(tags)]
+        self.tagWeights = list(itertools.accumulate(1 / (i + 1) ** tag_skew for i in range(tags)))
+        self.Text = Distribution(text)
+        self.Seed = seed
+
+    def Events(self):
+        # (depth, tag, text, leaf) for every element in document order
+        rng = random.Random(self.Seed)
+        tags, weights, total = self.Tags, self.tagWeights, self.tagWeights[-1]
+        stack = [(self.Nodes, 0, self.MaxDepth)]
+        while stack:
+            budget, depth, limit = stack.pop()
+            tag = "synthetic" if depth == 0 else tags[bisect.bisect(weights, rng.random() * total)]
+            if budget == 1:
+                yield depth, tag, self.SampleText(rng), True
+                continue
+            yield depth, tag, None, False
+            rest = budget - 1
+            if limit is not None and depth + 1 >= limit:
+                count = rest
+            else:
+                count = max(1, min(self.Fanout.Sample(rng), rest))
+            sizes = self.Split(rng, rest, count)
+            if depth == 0 and self.Depth is not None:
+                limits = [self.BranchDepth(rng) for _ in sizes]
+            else:
+                limits = [limit] * len(sizes)
+            stack.extend((size, depth + 1, childLimit) for size, childLimit in zip(reversed(sizes), reversed(limits)))
+
+    def BranchDepth(self, rng):
+        # Depth a root child's leaves stop at
+        branchDepth = max(2, self.Depth.Sample(rng))
+        return branchDepth if self.MaxDepth is None else min(branchDepth, self.MaxDepth)
+
+    def Split(self, rng, rest, count):
+        # count subtree sizes of at least 1 adding up to rest
+        if self.SplitKind == "even":
+            size, extra = divmod(rest, count)
+            return [size + 1] * extra + [size] * (count - extra)
+        weights = [rng.expovariate(1.0) for _ in range(count)]
+        scale = (rest - count) / sum(weights)
+        sizes = [1 + int(weight * scale) for weight in weights]
+        for _ in range(rest - sum(sizes)):
+            sizes[rng.randrange(count)] += 1
+        return sizes
+
+    def SampleText(self, rng):
+        length = self.Text.Sample(rng)
+        if length <= 0:
+            return None
+        if length >= len(TreeShape.TEXT):
+            return (TreeShape.TEXT * (length // len(TreeShape.TEXT) + 1))[:length]
+        start = rng.randrange(len(TreeShape.TEXT) - length)
+        return TreeShape.TEXT[start:start + length]
+
+    def BuildTree(self, xml_nodes=False, index=None):
+        # The document as an Element tree, or with xml_nodes as the XmlNode
+        # tree over the Elements, built in the same pass; index, a TagIndex,
+        # gets every node in document order
+        stack = []
+        root = None
+        for depth, tag, text, leaf in self.Events():
+            element = Element(tag)
+            element.text = text
+            node = XmlNode(tag, element) if xml_nodes else element
+            if index is not None:
+                index.Add(node)
+            del stack[depth:]
+            if stack:
+                parentElement, parentNode = stack[-1]
+                parentElement.append(element)
+                if xml_nodes:
+                    parentNode.AddChild(node)
+            else:
+                root = node
+            stack.append((element, node))
+        return root
+
+    def WriteXml(self, output_path, indent="  "):
+        # Streams the document to output_path, laid out like ET.indent output;
+        # returns the number of elements written
+        count = 0
+        with open(output_path, "w", encoding="utf-8", buffering=1 << 20) as file:
+            file.write("<?xml version='1.0' encoding='utf-8'?>\n")
+            open_tags = []
+            for depth, tag, text, leaf in self.Events():
+                while len(open_tags) > depth:
+                    file.write(f"{indent * (len(open_tags) - 1)}</{open_tags.pop()}>\n")
+                if not leaf:
+                    file.write(f"{indent * depth}<{tag}>\n")
+                    open_tags.append(tag)
+                elif text:
+                    file.write(f"{indent * depth}<{tag}>{text}</{tag}>\n")
+                else:
+                    file.write(f"{indent * depth}<{tag} />\n")
+                count += 1
+            while open_tags:
+                file.write(f"{indent * (len(open_tags) - 1)}</{open_tags.pop()}>\n")
+        return count
+
+    def Statistics(self):
+        # Depth profile of the shape without building it: element count,
+        # leaf count, mean and maximum depth, and widest fanout
+        count = leaves = depths = deepest = widest = 0
+        children = [0]
+        for depth, tag, text, leaf in self.Events():
+            del children[depth + 1:]
+            children[depth] += 1
+            widest = max(widest, children[depth])
+            children.append(0)
+            count += 1
+            depths += depth
+            deepest = max(deepest, depth)
+            leaves += leaf
+        return {"nodes": count, "leaves": leaves, "mean_depth": depths / count,
+                "max_depth": deepest, "max_fanout": widest}
+
+class UpdateTrace:
+    # Insertion points for a run of inserts into a labeled tree. Each is a
+    # node of the original tree, given by its rank in document order, and
+    # the fraction of its child list to insert at, turned into a position
+    # when the insert is applied, as the list grows over the trace. "head"
+    # and "tail" skew both towards the start or end of the document (rank
+    # u ** power of the way in, u uniform) and of the child list; "random"
+    # is uniform in both
+    SKEWS = ("head", "tail", "random")
+
+    @staticmethod
+    def Generate(size, count, skew="random", seed=0, power=3):
+        if skew not in UpdateTrace.SKEWS:
+            raise ValueError(f"Unknown skew: {skew}")
+        rng = random.Random(seed)
+        trace = []
+        for _ in range(count):
+            u = rng.random()
+            if skew == "head":
+                trace.append((int(size * u ** power), 0.0))
+            elif skew == "tail":
+                trace.append((size - 1 - int(size * u ** power), 1.0))
+            else:
+                trace.append((int(size * u), rng.random()))
+        return trace
+
+    @staticmethod
+    def Apply(trace, nodes, insert, payload):
+        # Runs the trace against nodes, the original tree in document order:
+        # insert(parent, position, node) labels one new subtree and returns
+        # the labels it touched, payload() makes the next new subtree.
+        # Returns the total touched
+        touched = 0
+        for rank, fraction in trace:
+            parent = nodes[rank]
+            touched += insert(parent, round(fraction * len(parent.Children)), payload())
+        return touched
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic XML document")
+    parser.add_argument("output", help="XML file to write")
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--fanout", default="uniform:2-12", help="fixed:N, uniform:LO-HI or geometric:MEAN")
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--depth", help="distribution of the depth each root child's subtree reaches")
+    parser.add_argument("--split", default="random", choices=("even", "random"))
+    parser.add_argument("--tags", type=int, default=32, help="size of the tag vocabulary")
+    parser.add_argument("--tag-skew", type=float, default=1.0, help="Zipf exponent of tag frequencies")
+    parser.add_argument("--text", default="geometric:8", help="distribution of leaf text lengths")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stats", action="store_true", help="print the depth profile (a second pass)")
+    args = parser.parse_args()
+
+    shape = TreeShape(args.nodes, args.fanout, args.max_depth, args.depth, args.split, args.tags, args.tag_skew,
+                      args.text, args.seed)
+    start_time = time.time()
+    count = shape.WriteXml(args.output)
+    elapsed_time = time.time() - start_time
+    size = os.path.getsize(args.output) / (1 << 20)  # MB
+    print(f"{count} elements, {size:.2f} MB written to {args.output} in {elapsed_time * 1000:.2f} ms "
+          f"({count / elapsed_time:.0f} elements/s)")
+    if args.stats:
+        print(", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                        for key, value in shape.Statistics().items()))
+
+if __name__ == "__main__":
+    main()